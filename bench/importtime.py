@@ -0,0 +1,84 @@
+"""Orçamento de tempo de importação medido com `python -X importtime`.
+
+    python -m bench.importtime             # falha (exit 1) se algum orçamento estourar
+    python -m bench.importtime --top 20    # mostra os 20 módulos mais caros
+
+Mede a inicialização da CLI até o prompt (`import main`) e a importação do
+grafo (`import src.workflow`), e garante que os backends pesados continuam
+sendo importados só quando um nó precisa deles.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamentos em milissegundos (tempo cumulativo do módulo raiz)
+BUDGETS_MS = {
+    "main": 100,
+    "src.workflow": 1500,
+}
+
+# Nunca devem ser carregados só por importar o grafo
+LAZY_MODULES = [
+    "langchain_google_genai",
+    "yfinance",
+    "ddgs",
+    "duckduckgo_search",
+    "langchain_community.utilities.google_search",
+]
+
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(module):
+    """[(módulo, self_us, cumulativo_us)] na ordem em que foram importados."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orçamento de importação do Olimpia.")
+    parser.add_argument("--top", type=int, default=10, help="Módulos mais caros a exibir")
+    parser.add_argument("--repeat", type=int, default=3, help="Medições (vale a menor)")
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in BUDGETS_MS.items():
+        # A menor de N medições descarta o ruído do cache de disco
+        runs = [measure(module) for _ in range(args.repeat)]
+        rows = min(runs, key=lambda r: r[-1][2])
+        total_ms = rows[-1][2] / 1000
+        ok = total_ms <= budget
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} import {module}: {total_ms:.0f} ms (orçamento {budget} ms)")
+
+        loaded = {name for name, _, _ in rows}
+        for lazy in LAZY_MODULES:
+            if lazy in loaded:
+                failed = True
+                print(f"   ❌ {lazy} importado na inicialização (deveria ser tardio)")
+
+        for name, self_us, _ in sorted(rows, key=lambda r: -r[1])[: args.top]:
+            print(f"   {self_us / 1000:>8.1f} ms  {name}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Gera as fixtures do benchmark (uma por empresa) em bench/fixtures/.
+
+    python -m bench.record            # fixtures sintéticas e determinísticas
+    python -m bench.record --live     # grava DDG, HEAD e yfinance de verdade
+
+As respostas do Gemini são sempre geradas a partir das notícias gravadas
+(o substituto do modelo monta a curadoria a partir do próprio prompt).
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from src.ticker_index import normalize
+
+from .standins import FIXTURES_DIR
+
+# Empresa, ticker, setor, preço inicial e dividendos por trimestre (fração)
+COMPANIES = [
+    ("Petrobras", "PETR4.SA", "Petróleo e Gás", 38.0, 0.035),
+    ("Vale", "VALE3.SA", "Mineração", 62.0, 0.02),
+    ("Itaú", "ITUB4.SA", "Bancos", 36.0, 0.018),
+    ("Magazine Luiza", "MGLU3.SA", "Varejo", 9.0, 0.0),
+    ("WEG", "WEGE3.SA", "Bens Industriais", 45.0, 0.004),
+    # Fora do índice local: exercitam a busca do TickerFinder
+    ("Mills", "MILS3.SA", "Locação de Máquinas", 12.0, 0.012),
+    ("Track & Field", "TFCO4.SA", "Varejo", 11.0, 0.006),
+]
+
+# Latências típicas medidas (segundos) por backend
+LATENCY = {
+    "ddg": 0.6,
+    "google": 0.35,
+    "http": 0.12,
+    "yfinance": 0.5,
+    "gemini_ttft": 0.8,
+    "gemini_chunk": 0.02,
+}
+
+LAST_SESSION = datetime.date(2026, 10, 16)
+
+_PORTALS = [
+    "https://www.infomoney.com.br/mercados/",
+    "https://valor.globo.com/empresas/noticia/2026/10/",
+    "https://www.moneytimes.com.br/",
+    "https://braziljournal.com/",
+    "https://einvestidor.estadao.com.br/mercado/",
+    "https://exame.com/negocios/",
+    "https://www.seudinheiro.com/2026/empresas/",
+    "https://www.cnnbrasil.com.br/economia/",
+]
+
+_HEADLINES = [
+    ("{c} reporta lucro de R$ {n} bilhões no trimestre", "Resultado veio acima do consenso, com margem maior e geração de caixa forte."),
+    ("{c} anuncia dividendos de R$ {d} por ação", "Conselho aprovou a distribuição de proventos com data-com na próxima semana."),
+    ("Balanço da {c}: o que esperar do resultado do 3º trimestre", "Analistas projetam receita estável e atenção ao endividamento."),
+    ("{t} sobe após resultado acima do esperado", "Ações avançam no Ibovespa depois do balanço trimestral."),
+    ("{c} anuncia recompra de ações e revisa guidance", "Companhia reporta plano de investimentos e nova política de capital."),
+    ("Bancos elevam preço-alvo de {t} após resultado", "Revisão reflete lucro recorrente maior e dividendos extraordinários."),
+    ("{c} reporta queda no lucro, mas mantém dividendo", "Custos mais altos pesaram no trimestre, segundo a companhia."),
+    ("{c} fecha aquisição e reforça resultado operacional", "Operação de M&A deve adicionar receita a partir do próximo ano."),
+    ("Como investir em ações: guia para iniciantes", "Tutorial com o passo a passo para abrir conta na corretora."),
+    ("Cotação {t} hoje", "Acompanhe o gráfico e os indicadores da ação em tempo real."),
+]
+
+
+def _slug(text):
+    return normalize(text).lower().replace(" ", "-")
+
+
+def _history(rng, price, dividend):
+    dates = pd.bdate_range(end=LAST_SESSION, periods=252)
+    returns = rng.normal(0.0004, 0.018, len(dates))
+    close = price * np.exp(np.cumsum(returns))
+    high = close * (1 + np.abs(rng.normal(0, 0.008, len(dates))))
+    low = close * (1 - np.abs(rng.normal(0, 0.008, len(dates))))
+    open_ = np.clip(close * (1 + rng.normal(0, 0.005, len(dates))), low, high)
+    dividends = np.zeros(len(dates))
+    if dividend:
+        for i in range(40, len(dates), 63):
+            dividends[i] = round(close[i] * dividend, 4)
+    # Adj Close incorpora os proventos (fator acumulado para trás)
+    factor = np.ones(len(dates))
+    for i in np.nonzero(dividends)[0]:
+        factor[:i] *= 1 - dividends[i] / close[i - 1]
+    frame = pd.DataFrame(
+        {
+            "Open": open_,
+            "High": high,
+            "Low": low,
+            "Close": close,
+            "Adj Close": close * factor,
+            "Volume": rng.integers(1_000_000, 40_000_000, len(dates)).astype(float),
+            "Dividends": dividends,
+            "Stock Splits": 0.0,
+        },
+        index=dates,
+    )
+    return frame.round(4)
+
+
+def _news(rng, company, ticker):
+    root = ticker.replace(".SA", "")
+    news = []
+    for i, (title, body) in enumerate(_HEADLINES):
+        portal = _PORTALS[i % len(_PORTALS)]
+        title = title.format(c=company, t=root, n=rng.integers(1, 30), d=f"{rng.uniform(0.1, 2.5):.2f}")
+        if title.startswith("Cotação"):
+            href = f"https://www.infomoney.com.br/cotacoes/b3/acao/{_slug(company)}-{root.lower()}/"
+        else:
+            href = f"{portal}{_slug(title)}/"
+        news.append({"title": f"{title} - {portal.split('/')[2]}", "href": href, "body": body})
+    return news
+
+
+def _report(company, news):
+    items = "\n\n".join(
+        f"* **[{n['title'].split(' - ')[0]}]({n['href']})**\n  > {n['body']}" for n in news[:3]
+    )
+    profile = (
+        f"A {company} é uma das principais companhias listadas na B3 em seu setor, com operação "
+        "diversificada, geração de caixa consistente e histórico de disciplina na alocação de "
+        "capital. Para o investidor, os pontos de atenção são o ciclo de preços do setor, a "
+        "política de dividendos e a execução do plano de investimentos anunciado ao mercado."
+    )
+    return (
+        f"## 🏢 Perfil Corporativo\n{profile}\n\n## 📰 Notícias Recentes\n{items}\n\n"
+        "---\n*Relatório gerado por AI (Olimpia Agent).*"
+    )
+
+
+def synthetic_fixture(company, ticker, sector, price, dividend):
+    seed = zlib.crc32(company.encode("utf-8"))
+    rng = np.random.default_rng(seed)
+    history = _history(rng, price, dividend)
+    news = _news(rng, company, ticker)
+    root = ticker.replace(".SA", "")
+
+    links = {n["href"]: 200 for n in news}
+    # Alguns links quebrados, como nas buscas reais
+    shuffled = random.Random(seed).sample(list(links), 3)
+    links[shuffled[0]] = 404
+    links[shuffled[1]] = 403
+    links[shuffled[2]] = None
+
+    last_close = float(history["Close"].iloc[-1])
+    return {
+        "company": company,
+        "ticker": ticker,
+        "latency": LATENCY,
+        "search": {
+            "summary": [
+                {
+                    "title": f"{company} - Sobre a empresa",
+                    "href": f"https://ri.{_slug(company)}.com.br/sobre",
+                    "body": f"A {company} atua no segmento de {sector.lower()} e é listada na B3 ({root}).",
+                },
+                {
+                    "title": f"{company} | Relações com Investidores",
+                    "href": f"https://ri.{_slug(company)}.com.br/",
+                    "body": f"Informações financeiras, governança e comunicados da {company}.",
+                },
+            ],
+            "news": news,
+            "ticker": [
+                {
+                    "title": f"{root} - {company} | Status Invest",
+                    "href": f"https://statusinvest.com.br/acoes/{root.lower()}",
+                    "body": f"Cotação, indicadores e dividendos de {company} ({root}).",
+                }
+            ],
+        },
+        "links": links,
+        "info": {
+            "longName": company,
+            "sector": sector,
+            "currentPrice": last_close,
+            "dividendYield": round(dividend * 4 * 100, 2),
+        },
+        "quote": last_close,
+        "history": _history_to_json(history),
+        "gemini": {"ticker": root, "report": _report(company, news)},
+    }
+
+
+def _history_to_json(history):
+    split = history.to_dict(orient="split")
+    split["index"] = [d.strftime("%Y-%m-%d") for d in history.index]
+    return split
+
+
+def live_fixture(company, ticker, sector, *_):
+    """Grava buscas, status de links e histórico reais (precisa de rede)."""
+    from src.links import validate_links
+    from src.market_data import download_history, get_info, get_quote
+    from src.search import ddg_text
+
+    fixture = synthetic_fixture(company, ticker, sector, 1.0, 0.0)
+    latency = dict(LATENCY)
+    root = ticker.replace(".SA", "")
+
+    start = time.perf_counter()
+    news = ddg_text(f"{company} {root} lucro OR resultado OR balanço OR dividendo notícia", max_results=10, kind="news")
+    latency["ddg"] = round(time.perf_counter() - start, 3)
+    summary = ddg_text(f"{company} sobre empresa", max_results=2, kind="summary")
+    found = ddg_text(f"qual o ticker código da ação da empresa {company} B3", max_results=2, kind="ticker")
+
+    start = time.perf_counter()
+    _, statuses = validate_links(news, target=len(news))
+    latency["http"] = round((time.perf_counter() - start) / max(1, len(news)), 3)
+
+    start = time.perf_counter()
+    history = download_history([ticker])[ticker]
+    latency["yfinance"] = round(time.perf_counter() - start, 3)
+
+    fixture.update(
+        {
+            "latency": latency,
+            "search": {"summary": summary, "news": news, "ticker": found},
+            "links": {n["href"]: statuses.get(i) for i, n in enumerate(news)},
+            "info": get_info(ticker),
+            "quote": get_quote(ticker),
+            "history": _history_to_json(history.round(4)),
+        }
+    )
+    fixture["gemini"]["report"] = _report(company, news)
+    return fixture
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera as fixtures do benchmark.")
+    parser.add_argument("--live", action="store_true", help="Grava dos serviços reais")
+    parser.add_argument("--out", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    build = live_fixture if args.live else synthetic_fixture
+    for spec in COMPANIES:
+        fixture = build(*spec)
+        path = os.path.join(args.out, f"{_slug(spec[0])}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, ensure_ascii=False, indent=1, default=str)
+        print(f"✓ {spec[0]:<16} → {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Benchmark offline dos nós e do grafo completo.
+
+    python -m bench.run                       # roda e grava bench/results/<commit>.json
+    python -m bench.run --compare HEAD~1      # compara com o resultado de outro commit
+    python -m bench.run --latency-scale 0     # só CPU (sem as latências gravadas)
+
+Além dos nós isolados, o grafo roda frio e quente com `invoke` e frio com
+`ainvoke` (nós assíncronos).
+
+Todos os serviços externos são substituídos pelas fixtures de bench/fixtures/
+(ver `standins.py`); cada repetição começa com os caches vazios.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# O ambiente precisa estar pronto antes de importar o projeto
+_TMP = tempfile.mkdtemp(prefix="olimpia-bench-")
+os.environ["OLIMPIA_CACHE_DIR"] = os.path.join(_TMP, "cache")
+os.environ["OLIMPIA_PROFILE_DIR"] = os.path.join(_TMP, "profiles")
+os.environ["OLIMPIA_GEMINI_RPM"] = "100000"
+os.environ["GEMINI_API_KEY"] = "bench-1,bench-2"
+
+from src import analytics, cache, checkpoint, config, market_data  # noqa: E402
+from src.metrics import percentile, track_run  # noqa: E402
+
+from .standins import Replay, installed, load_fixtures  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+NODES = ["ticker", "researcher", "market", "editor"]
+SCENARIOS = NODES + ["market_table", "app_cold", "app_warm", "app_async"]
+# Variação a partir da qual a comparação destaca uma regressão
+REGRESSION_THRESHOLD = 0.10
+
+
+def _git_rev():
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--", "src", "main.py"],
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        return f"{rev}-dirty" if dirty else rev
+    except (OSError, subprocess.CalledProcessError):
+        return "local"
+
+
+def _reset_caches(run_id):
+    """Troca o diretório dos caches em disco e zera os caches em memória."""
+    directory = os.path.join(_TMP, f"cache-{run_id}")
+    cache.CACHE_DIR = directory
+    cache._market_cache = cache._url_cache = cache._search_cache = cache._llm_cache = None
+    market_data._validation_cache = market_data.TTLCache(
+        config.VALIDATION_TTL_SECONDS, config.VALIDATION_NEGATIVE_TTL_SECONDS
+    )
+    analytics._table = None
+
+
+def _measure(fn, label, trace):
+    """Executa `fn` medindo tempo, chamadas externas e (opcional) memória."""
+    if trace:
+        tracemalloc.start()
+    with track_run(label) as run, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+    sample = {
+        "seconds": seconds,
+        "calls": {name: c["calls"] for name, c in run.to_dict()["backends"].items()},
+        "cache_hits": sum(c["cache_hits"] for c in run.to_dict()["backends"].values()),
+        "errors": len(run.errors),
+    }
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        sample["peak_kb"] = peak / 1024
+    return result, sample
+
+
+def _run_company(app, fixture, run_id, trace):
+    """Uma repetição para uma empresa: nós em cadeia, grafo frio e quente."""
+    from src.nodes.editor import node_editor
+    from src.nodes.market import node_market_analyst
+    from src.nodes.researcher import node_researcher
+    from src.nodes.ticker import node_ticker_finder
+
+    company = fixture["company"]
+    samples = {}
+
+    _reset_caches(f"{run_id}-nodes")
+    state = {"company_name": company}
+    for name, node in zip(
+        NODES, [node_ticker_finder, node_researcher, node_market_analyst, node_editor]
+    ):
+        update, samples[name] = _measure(lambda: node(state), company, trace)
+        state = {**state, **update}
+
+    # Market Analyst com a tabela pré-calculada (montada em memória a partir
+    # do histórico já em cache, como faria o job após o fechamento)
+    ticker = state["ticker"]
+    analytics._table = analytics.AnalyticsTable.from_histories(
+        market_data.load_histories([ticker])
+    )
+    _, samples["market_table"] = _measure(lambda: node_market_analyst(state), company, trace)
+    analytics._table = None
+
+    _reset_caches(f"{run_id}-app")
+    config_ = checkpoint.thread_config(company, refresh=True)
+    for name in ("app_cold", "app_warm"):
+        _, samples[name] = _measure(
+            lambda: app.invoke({"company_name": company}, config_), company, trace
+        )
+
+    # Mesmo grafo frio pelos nós assíncronos (`ainvoke`)
+    _reset_caches(f"{run_id}-async")
+    _, samples["app_async"] = _measure(lambda: _ainvoke(company, config_), company, trace)
+    return samples
+
+
+def _ainvoke(company, config_):
+    from src.workflow import get_async_app
+
+    async def run():
+        app = await get_async_app()
+        try:
+            return await app.ainvoke({"company_name": company}, config_)
+        finally:
+            await checkpoint.aclose_checkpointer()
+
+    return asyncio.run(run())
+
+
+def _summarize(samples):
+    seconds = [s["seconds"] for s in samples]
+    summary = {
+        "runs": len(samples),
+        "mean": sum(seconds) / len(seconds),
+        "p50": percentile(seconds, 50),
+        "p95": percentile(seconds, 95),
+        "min": min(seconds),
+        "calls": {},
+        "cache_hits": sum(s["cache_hits"] for s in samples) / len(samples),
+        "errors": sum(s["errors"] for s in samples),
+    }
+    for s in samples:
+        for backend, n in s["calls"].items():
+            summary["calls"][backend] = summary["calls"].get(backend, 0) + n
+    summary["calls"] = {b: round(n / len(samples), 2) for b, n in summary["calls"].items()}
+    summary["cache_hits"] = round(summary["cache_hits"], 2)
+    return summary
+
+
+def run_bench(companies, repeat, latency_scale):
+    from src.workflow import app
+
+    fixtures = load_fixtures()
+    if companies:
+        fixtures = {c: f for c, f in fixtures.items() if c in companies}
+    replay = Replay(fixtures, latency_scale=latency_scale)
+
+    samples = {name: [] for name in SCENARIOS}
+    with installed(replay):
+        # Aquece imports e clientes fora da medição
+        _run_company(app, next(iter(fixtures.values())), "warmup", trace=False)
+        for i in range(repeat):
+            for fixture in fixtures.values():
+                for name, sample in _run_company(app, fixture, f"{i}", trace=False).items():
+                    samples[name].append(sample)
+        # Uma passada extra só para memória (tracemalloc distorce os tempos)
+        for fixture in fixtures.values():
+            for name, sample in _run_company(app, fixture, "mem", trace=True).items():
+                samples[name].append({**sample, "seconds": None})
+
+    results = {}
+    for name, runs in samples.items():
+        timed = [s for s in runs if s["seconds"] is not None]
+        results[name] = _summarize(timed)
+        peaks = [s["peak_kb"] for s in runs if "peak_kb" in s]
+        results[name]["peak_kb"] = max(peaks) if peaks else 0.0
+    return results
+
+
+def _load_results(ref):
+    if os.path.exists(ref):
+        path = ref
+    else:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", ref], capture_output=True, text=True
+        ).stdout.strip() or ref
+        path = os.path.join(RESULTS_DIR, f"{rev}.json")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _delta(new, old):
+    if not old:
+        return ""
+    change = (new - old) / old
+    mark = " ⚠️" if change > REGRESSION_THRESHOLD else ""
+    return f"{change:+.0%}{mark}"
+
+
+def print_results(report, baseline=None):
+    results = report["results"]
+    base = baseline["results"] if baseline else {}
+    title = f"Benchmark {report['rev']}"
+    if baseline:
+        title += f" vs {baseline['rev']}"
+    print(f"\n{config.Colors.BOLD}{title}{config.Colors.ENDC}")
+    print(
+        f"{'CENÁRIO':<12} {'P50':>8} {'P95':>8} {'Δ P50':>8} {'PICO KB':>9} {'Δ MEM':>8} "
+        f"{'CHAMADAS':>9} {'Δ CHAM.':>8}"
+    )
+    for name, r in results.items():
+        old = base.get(name, {})
+        calls = sum(r["calls"].values())
+        old_calls = sum(old.get("calls", {}).values()) if old else 0
+        print(
+            f"{name:<12} {r['p50']:>7.3f}s {r['p95']:>7.3f}s {_delta(r['p50'], old.get('p50')):>8} "
+            f"{r['peak_kb']:>9.0f} {_delta(r['peak_kb'], old.get('peak_kb')):>8} "
+            f"{calls:>9.1f} {_delta(calls, old_calls):>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do Olimpia.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por empresa")
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=0.1,
+        help="Fator aplicado às latências gravadas (0 mede só CPU)",
+    )
+    parser.add_argument("--companies", nargs="*", help="Subconjunto das fixtures")
+    parser.add_argument("--compare", metavar="REF", help="Commit ou arquivo de resultados base")
+    parser.add_argument("--no-save", action="store_true", help="Não grava o resultado")
+    args = parser.parse_args()
+
+    # Sem Google CSE: o benchmark segue o caminho padrão (DuckDuckGo)
+    for var in ("GOOGLE_CSE_ID", "GOOGLE_API_KEY"):
+        os.environ.pop(var, None)
+
+    report = {
+        "rev": _git_rev(),
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "latency_scale": args.latency_scale,
+        "results": run_bench(args.companies, args.repeat, args.latency_scale),
+    }
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{report['rev']}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📁 Resultado salvo em {path}")
+
+    print_results(report, _load_results(args.compare) if args.compare else None)
+
+
+if __name__ == "__main__":
+    main()
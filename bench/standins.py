@@ -0,0 +1,267 @@
+"""Substitutos locais dos serviços externos usados pelo benchmark.
+
+Cada substituto é instalado na "costura" mais baixa possível (cliente DDG,
+wrapper do Google, checagem HTTP, módulo yfinance e cliente do Gemini), de
+modo que cache, métricas, semáforos e a lógica dos nós continuam rodando
+como em produção. As latências vêm das fixtures e podem ser escaladas.
+"""
+
+import asyncio
+import contextlib
+import glob
+import json
+import os
+import re
+import time
+import zlib
+
+import pandas as pd
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+_TICKER_PROMPT = "Responda APENAS o código"
+_CURATION_PROMPT = "Resuma as "
+_CURATION_ITEM_RE = re.compile(r"Título: (.*)\nLink: (.*)\nResumo: (.*)")
+
+
+def load_fixtures(directory=FIXTURES_DIR):
+    """Lê todas as fixtures (uma por empresa) indexadas pelo nome da empresa."""
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            fixture = json.load(f)
+        fixture["history"] = pd.DataFrame(**fixture["history"])
+        fixture["history"].index = pd.to_datetime(fixture["history"].index)
+        fixtures[fixture["company"]] = fixture
+    return fixtures
+
+
+class Replay:
+    """Resolve qual fixture responde a uma query, URL, ticker ou prompt."""
+
+    def __init__(self, fixtures, latency_scale=1.0):
+        self.fixtures = fixtures
+        self.scale = latency_scale
+        # Nomes mais longos primeiro (desempate quando dois começam juntos)
+        self._by_name = sorted(fixtures.values(), key=lambda f: -len(f["company"]))
+        self._by_ticker = {f["ticker"]: f for f in fixtures.values()}
+        self._links = {}
+        for f in fixtures.values():
+            self._links.update(f["links"])
+
+    def sleep(self, fixture, key, n=1):
+        if fixture and self.scale:
+            time.sleep(fixture["latency"][key] * self.scale * n)
+
+    async def asleep(self, fixture, key, n=1):
+        if fixture and self.scale:
+            await asyncio.sleep(fixture["latency"][key] * self.scale * n)
+
+    def for_text(self, text):
+        """Fixture da empresa citada primeiro no texto (nome ou raiz do ticker)."""
+        lowered = text.lower()
+        best, best_pos = None, len(lowered) + 1
+        for f in self._by_name:
+            for key in (f["company"].lower(), f["ticker"][:4].lower()):
+                pos = lowered.find(key)
+                if pos != -1 and pos < best_pos:
+                    best, best_pos = f, pos
+        return best
+
+    def for_ticker(self, ticker):
+        return self._by_ticker.get(ticker)
+
+    def search(self, query, limit):
+        """Resultados gravados para a query (o tipo sai do texto da busca)."""
+        fixture = self.for_text(query)
+        if fixture is None:
+            return None, []
+        q = query.lower()
+        if "código" in q or "ticker" in q:
+            results = fixture["search"]["ticker"]
+        elif "sobre empresa" in q or "ri institucional" in q:
+            results = fixture["search"]["summary"]
+        else:
+            # Camadas diferentes devolvem recortes diferentes das notícias
+            news = fixture["search"]["news"]
+            shift = zlib.crc32(query.encode("utf-8")) % max(1, len(news))
+            results = news[shift:] + news[:shift]
+        return fixture, [dict(r) for r in results[:limit]]
+
+    def link_status(self, url):
+        return self._links.get(url, 200)
+
+    def answer(self, prompt):
+        """(fixture, texto) que o Gemini "responderia" para o prompt."""
+        fixture = self.for_text(prompt)
+        if _TICKER_PROMPT in prompt:
+            return fixture, fixture["gemini"]["ticker"] if fixture else "N/A"
+        if _CURATION_PROMPT in prompt:
+            items = _CURATION_ITEM_RE.findall(prompt)[:3]
+            return fixture, "\n\n".join(
+                f"* **[{title}]({link})**\n  > {body[:140]}" for title, link, body in items
+            )
+        return fixture, fixture["gemini"]["report"] if fixture else "## 🏢 Perfil Corporativo\n-"
+
+
+class FakeDDGS:
+    """Substitui `DDGS` (context manager com `.text`)."""
+
+    replay = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, query, region=None, max_results=10, timelimit=None):
+        fixture, results = self.replay.search(query, max_results)
+        self.replay.sleep(fixture, "ddg")
+        return results
+
+
+class FakeGoogle:
+    """Substitui o GoogleSearchAPIWrapper (resultados com title/link/snippet)."""
+
+    def __init__(self, replay):
+        self.replay = replay
+
+    def results(self, query, num_results=8):
+        fixture, results = self.replay.search(query, num_results)
+        self.replay.sleep(fixture, "google")
+        return [
+            {"title": r["title"], "link": r["href"], "snippet": r["body"]} for r in results
+        ]
+
+
+def make_check(replay):
+    """Substitui `links._check` (status HTTP gravado, com latência assíncrona)."""
+
+    from src.metrics import timed_call
+
+    async def check(client, url, timeout):
+        fixture = replay.for_text(url) or next(iter(replay.fixtures.values()))
+        with timed_call("http_check"):
+            if replay.scale:
+                await asyncio.sleep(fixture["latency"]["http"] * replay.scale)
+        status = replay.link_status(url)
+        return (status, url) if status else (None, None)
+
+    return check
+
+
+class _FastInfo:
+    def __init__(self, price):
+        self.last_price = price
+
+
+class _FakeTicker:
+    def __init__(self, replay, ticker):
+        self._fixture = replay.for_ticker(ticker)
+        self._replay = replay
+
+    @property
+    def info(self):
+        self._replay.sleep(self._fixture, "yfinance")
+        return dict(self._fixture["info"]) if self._fixture else {}
+
+    @property
+    def fast_info(self):
+        self._replay.sleep(self._fixture, "yfinance")
+        return _FastInfo(self._fixture["quote"] if self._fixture else None)
+
+
+class FakeYFinance:
+    """Substitui o módulo `yfinance` (download em lote e Ticker)."""
+
+    def __init__(self, replay):
+        self.replay = replay
+
+    def download(self, tickers, start=None, period=None, **kwargs):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {}
+        for ticker in tickers:
+            fixture = self.replay.for_ticker(ticker)
+            if fixture is None:
+                continue
+            hist = fixture["history"]
+            if start is not None:
+                hist = hist[hist.index >= pd.Timestamp(start)]
+            frames[ticker] = hist
+        # Uma ida à rede por download, como no yf.download real
+        self.replay.sleep(next(iter(self.replay.fixtures.values())), "yfinance")
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+    def Ticker(self, ticker):
+        return _FakeTicker(self.replay, ticker)
+
+
+class _Message:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeChatModel:
+    """Substitui o ChatGoogleGenerativeAI (invoke e stream, síncronos e async)."""
+
+    CHUNK_CHARS = 40
+
+    def __init__(self, replay):
+        self.replay = replay
+
+    def _chunks(self, text):
+        return [text[i : i + self.CHUNK_CHARS] for i in range(0, len(text), self.CHUNK_CHARS)]
+
+    def invoke(self, messages):
+        fixture, text = self.replay.answer(messages[-1].content)
+        self.replay.sleep(fixture, "gemini_ttft")
+        self.replay.sleep(fixture, "gemini_chunk", len(self._chunks(text)))
+        return _Message(text)
+
+    def stream(self, messages):
+        fixture, text = self.replay.answer(messages[-1].content)
+        self.replay.sleep(fixture, "gemini_ttft")
+        for piece in self._chunks(text):
+            self.replay.sleep(fixture, "gemini_chunk")
+            yield _Message(piece)
+
+    async def ainvoke(self, messages):
+        fixture, text = self.replay.answer(messages[-1].content)
+        await self.replay.asleep(fixture, "gemini_ttft")
+        await self.replay.asleep(fixture, "gemini_chunk", len(self._chunks(text)))
+        return _Message(text)
+
+    async def astream(self, messages):
+        fixture, text = self.replay.answer(messages[-1].content)
+        await self.replay.asleep(fixture, "gemini_ttft")
+        for piece in self._chunks(text):
+            await self.replay.asleep(fixture, "gemini_chunk")
+            yield _Message(piece)
+
+
+@contextlib.contextmanager
+def installed(replay):
+    """Instala os substitutos nos módulos do projeto e restaura ao sair."""
+    from src import links, llm, market_data, search
+
+    FakeDDGS.replay = replay
+    google = FakeGoogle(replay)
+    chat = FakeChatModel(replay)
+    patches = [
+        (search, "DDGS", FakeDDGS),
+        (search, "_google_wrapper", lambda: google),
+        (links, "_check", make_check(replay)),
+        (market_data, "yf", FakeYFinance(replay)),
+        (llm.LLMPool, "_client", lambda self, slot, model, temperature: chat),
+    ]
+    saved = [(target, name, getattr(target, name)) for target, name, _ in patches]
+    try:
+        for target, name, value in patches:
+            setattr(target, name, value)
+        yield
+    finally:
+        for target, name, value in saved:
+            setattr(target, name, value)
@@ -1,12 +1,115 @@
+import argparse
+import importlib
 import os
 import re
 import sys
+import threading
+
+from src.env import load_env
+
+# O .env precisa estar carregado antes de importar as configurações
+load_env()
+
+from src.config import Colors  # noqa: E402
+from src.utils import MarkdownStreamPrinter, print_styled  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Agente de pesquisa de empresas da B3.")
+    parser.add_argument("empresa", nargs="*", help="Nome da empresa ou ticker")
+    parser.add_argument(
+        "--batch",
+        metavar="ARQUIVO",
+        help="Arquivo com uma empresa por linha ('-' para ler do stdin)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Número de relatórios simultâneos (batch e servidor)",
+    )
+    parser.add_argument(
+        "--out", default="relatorios", help="Pasta de saída dos relatórios do batch"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Mostra ao final a tabela de tempos por etapa e por backend",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignora os checkpoints salvos e refaz todas as etapas",
+    )
+    parser.add_argument(
+        "--peers",
+        action="store_true",
+        help="Inclui a comparação com as empresas do mesmo setor (aceita o nome do setor)",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Notícias só pelo ranking local, sem a chamada de curadoria ao Gemini",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Sobe o serviço HTTP de relatórios (POST /report, /health, /metrics)",
+    )
+    parser.add_argument(
+        "--refresh-analytics",
+        action="store_true",
+        help="Recalcula a tabela de métricas de todos os ativos (ex: cron após o fechamento)",
+    )
+    parser.add_argument("--host", default=None, help="Endereço do servidor (--serve)")
+    parser.add_argument("--port", type=int, default=None, help="Porta do servidor (--serve)")
+    return parser.parse_args()
 
-from src.config import Colors
-from src.utils import print_styled
-from src.workflow import app
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.fast:
+        # Lido pelo Researcher a cada execução (vale também para batch e servidor)
+        os.environ["OLIMPIA_NEWS_FAST"] = "1"
+
+    if args.serve:
+        from src.config import SERVER_HOST, SERVER_PORT, SERVER_WORKERS
+        from src.server import serve
+
+        serve(
+            host=args.host or SERVER_HOST,
+            port=args.port or SERVER_PORT,
+            workers=args.workers or SERVER_WORKERS,
+        )
+        sys.exit()
+
+    if args.refresh_analytics:
+        from src.analytics import refresh
+
+        refresh()
+        sys.exit()
+
+    if args.batch:
+        from src.batch import read_companies, run_batch
+
+        companies = read_companies(args.batch)
+        if not companies:
+            sys.exit()
+        run_batch(
+            companies,
+            workers=args.workers or 4,
+            out_dir=args.out,
+            refresh=args.refresh,
+            peers=args.peers,
+        )
+        sys.exit()
+
+    # O grafo (langgraph, pandas...) é importado em segundo plano enquanto o
+    # banner e o prompt já aparecem na tela
+    threading.Thread(
+        target=importlib.import_module, args=("src.workflow",), daemon=True
+    ).start()
+
     # Limpa o terminal
     os.system("cls" if os.name == "nt" else "clear")
 
@@ -16,8 +119,8 @@ if __name__ == "__main__":
 
     try:
         # Pega o input via argumento ou prompt
-        if len(sys.argv) > 1:
-            target = " ".join(sys.argv[1:])
+        if args.empresa:
+            target = " ".join(args.empresa)
         else:
             target = input(f"\n👉 {Colors.BOLD}Empresa: {Colors.ENDC}").strip()
 
@@ -29,14 +132,42 @@ if __name__ == "__main__":
         print(f"\n🚀 {Colors.BOLD}START: {target.upper()}{Colors.ENDC}")
         print("-" * 60)
 
-        # Executa o Grafo
-        res = app.invoke({"company_name": target})
+        from src.checkpoint import run_input, thread_config
+        from src.metrics import print_profile, track_run, write_profile
+        from src.workflow import app
 
-        # Exibe o Resultado Final Formatado
-        print("\n" + f"{Colors.GREEN}{'=' * 60}{Colors.ENDC}")
-        print_styled(res["final_report"])
+        # Executa o Grafo, imprimindo o relatório conforme o Editor o gera
+        res = {}
+        printer = MarkdownStreamPrinter()
+        config = thread_config(target, refresh=args.refresh, peers=args.peers)
+        with track_run(target) as run:
+            for mode, chunk in app.stream(
+                run_input(app, target, config), config, stream_mode=["custom", "values"]
+            ):
+                if mode == "values":
+                    res = chunk
+                elif chunk.get("report_restart"):
+                    printer.close()
+                    print(f"\n{Colors.WARNING}⚠️  Geração interrompida. Relatório completo:{Colors.ENDC}\n")
+                elif "report_chunk" in chunk:
+                    if not printer.started:
+                        print("\n" + f"{Colors.GREEN}{'=' * 60}{Colors.ENDC}")
+                    printer.feed(chunk["report_chunk"])
+            printer.close()
+
+        # Exibe o Resultado Final Formatado (se nada veio em streaming)
+        if not printer.started:
+            print("\n" + f"{Colors.GREEN}{'=' * 60}{Colors.ENDC}")
+            print_styled(res.get("final_report", ""))
         print(f"{Colors.GREEN}{'=' * 60}{Colors.ENDC}" + "\n")
 
+        # Perfil da execução (sempre gravado; a tabela só com --profile)
+        profile = run.to_dict()
+        profile_path = write_profile(profile)
+        if args.profile:
+            print_profile(profile)
+            print(f"\n📈 Perfil salvo em {profile_path}")
+
     except KeyboardInterrupt:
         print(f"\n{Colors.FAIL}Fim.{Colors.ENDC}")
     except Exception as e:
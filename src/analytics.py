@@ -0,0 +1,245 @@
+"""Tabela de métricas do dashboard pré-calculadas para o universo acompanhado.
+
+Depois do fechamento da B3 um job recalcula, em lote e vetorizado sobre o
+histórico em cache, a faixa de 52 semanas, o retorno total em 12 meses e o
+dividend yield (sempre como fração) de todos os tickers do índice e dos que
+já foram pedidos. O resultado fica em colunas NumPy em um `.npz`; o Market
+Analyst só faz uma busca por ticker e sobrepõe o último preço.
+"""
+
+import asyncio
+import datetime
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .cache import get_market_cache
+from .config import (
+    ANALYTICS_CHUNK,
+    ANALYTICS_LIVE_PRICE,
+    ANALYTICS_MAX_AGE_SECONDS,
+    ANALYTICS_PATH,
+    ANALYTICS_REFRESH_AT,
+    Colors,
+)
+from .log import log
+from .market_data import compute_metrics, get_quote, last_bar_dates, load_histories
+from .metrics import record_cache_hit, record_error
+from .ticker_index import get_ticker_index
+
+COLUMNS = ("price", "low52", "high52", "chg52", "div_yield", "dividends_12m")
+
+
+class AnalyticsTable:
+    """Colunas float64 (uma linha por ticker) com índice ticker -> linha."""
+
+    def __init__(self, tickers, columns, last_bar, as_of):
+        self.tickers = np.asarray(tickers, dtype=str)
+        self.columns = {name: np.asarray(columns[name], dtype=np.float64) for name in COLUMNS}
+        self.last_bar = np.asarray(last_bar, dtype=str)  # "YYYY-MM-DD" ou ""
+        self.as_of = float(as_of)
+        self._rows = {ticker: i for i, ticker in enumerate(self.tickers.tolist())}
+
+    def __len__(self):
+        return len(self._rows)
+
+    @classmethod
+    def from_histories(cls, histories, as_of=None):
+        """Calcula todas as linhas de uma vez com `compute_metrics`."""
+        metrics = compute_metrics(histories)
+        last = last_bar_dates(histories)
+        tickers = [t for t in metrics.index if last[t] is not None]
+        metrics = metrics.loc[tickers]
+        return cls(
+            tickers,
+            {name: metrics[name].to_numpy() for name in COLUMNS},
+            [last[t].strftime("%Y-%m-%d") for t in tickers],
+            as_of or time.time(),
+        )
+
+    @classmethod
+    def load(cls, path=ANALYTICS_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["tickers"],
+                {name: data[name] for name in COLUMNS},
+                data["last_bar"],
+                data["as_of"][()],
+            )
+
+    def save(self, path=ANALYTICS_PATH):
+        """Grava o `.npz` em um arquivo temporário e troca de uma vez (atômico)."""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    tickers=self.tickers,
+                    last_bar=self.last_bar,
+                    as_of=np.float64(self.as_of),
+                    **self.columns,
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def age(self, now=None):
+        return (now or time.time()) - self.as_of
+
+    def get(self, ticker):
+        """Linha do ticker como dict (mesmas chaves de `compute_metrics`) ou None."""
+        row = self._rows.get(ticker)
+        if row is None:
+            return None
+        values = {name: float(self.columns[name][row]) for name in COLUMNS}
+        values["last_bar"] = str(self.last_bar[row])
+        return values
+
+
+def with_live_price(row, price):
+    """Sobrepõe o último preço às métricas do fechamento anterior.
+
+    A faixa de 52 semanas passa a incluir o preço, o DY usa os proventos de
+    12 meses sobre o novo preço e o retorno em 12 meses é corrigido pela
+    variação desde o fechamento (o Adj Close só muda com provento novo).
+    """
+    row = dict(row)
+    base = row["price"]
+    if base and base > 0:
+        row["chg52"] = (1 + row["chg52"]) * price / base - 1
+    row["price"] = price
+    row["low52"] = min(row["low52"], price)
+    row["high52"] = max(row["high52"], price)
+    row["div_yield"] = row["dividends_12m"] / price
+    return row
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_analytics_table():
+    """Tabela carregada do disco (uma vez) ou None se ainda não foi gerada."""
+    global _table
+    with _table_lock:
+        if _table is None and os.path.exists(ANALYTICS_PATH):
+            try:
+                _table = AnalyticsTable.load()
+            except (OSError, ValueError, KeyError) as e:
+                record_error("tabela de métricas", e)
+        return _table
+
+
+def lookup(ticker, live=ANALYTICS_LIVE_PRICE):
+    """Métricas do ticker pela tabela (None se ausente ou velha demais)."""
+    table = get_analytics_table()
+    if table is None or table.age() > ANALYTICS_MAX_AGE_SECONDS:
+        return None
+    row = table.get(ticker)
+    if row is None:
+        return None
+    record_cache_hit("analytics")
+    if live:
+        price = get_quote(ticker)
+        if price:
+            row = with_live_price(row, float(price))
+    return row
+
+
+def group_metrics(tickers):
+    """Métricas de um grupo de tickers (comparação setorial) em uma passada.
+
+    As linhas frescas vêm da tabela pré-calculada; os tickers que faltarem
+    são carregados juntos por `load_histories` (um único download) e
+    calculados de uma vez por `compute_metrics`.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    table = get_analytics_table()
+    rows = {}
+    if table is not None and table.age() <= ANALYTICS_MAX_AGE_SECONDS:
+        rows = {t: table.get(t) for t in tickers}
+        rows = {t: row for t, row in rows.items() if row is not None}
+        record_cache_hit("analytics", len(rows))
+    frame = pd.DataFrame.from_dict(
+        {t: {name: row[name] for name in COLUMNS} for t, row in rows.items()},
+        orient="index",
+        columns=list(COLUMNS),
+    )
+    missing = [t for t in tickers if t not in rows]
+    if missing:
+        computed = compute_metrics(load_histories(missing))
+        frame = computed if frame.empty else pd.concat([frame, computed])
+    return frame.reindex(tickers)[list(COLUMNS)].astype(float)
+
+
+def tracked_universe():
+    """Tickers do índice da B3 mais os que já têm histórico em cache."""
+    tickers = [f"{s}.SA" for entry in get_ticker_index().entries for s in entry["tickers"]]
+    tickers += get_market_cache().tracked_tickers()
+    return list(dict.fromkeys(tickers))
+
+
+def refresh(tickers=None, chunk=ANALYTICS_CHUNK):
+    """Recalcula a tabela inteira e a publica (disco e memória).
+
+    O histórico vem de `load_histories` em blocos de `chunk` tickers (cache em
+    disco + um yf.download por bloco para o que faltar); as métricas são
+    calculadas de uma vez sobre todos os históricos.
+    """
+    global _table
+    tickers = list(dict.fromkeys(tickers or tracked_universe()))
+    start = time.perf_counter()
+    log.info(f"{Colors.HEADER}📐 [Analytics]{Colors.ENDC} Atualizando métricas de {len(tickers)} ativos...")
+
+    histories = {}
+    for i in range(0, len(tickers), max(1, chunk)):
+        block = tickers[i : i + chunk]
+        try:
+            histories.update(load_histories(block))
+        except Exception as e:
+            record_error("histórico da tabela de métricas", e)
+            log.warning(f"   {Colors.WARNING}⚠️ Bloco {i // chunk + 1} sem histórico: {e}{Colors.ENDC}")
+
+    table = AnalyticsTable.from_histories(histories)
+    table.save()
+    with _table_lock:
+        _table = table
+    log.info(
+        f"   ↳ {Colors.GREEN}{len(table)} ativos{Colors.ENDC} em "
+        f"{time.perf_counter() - start:.1f}s → {ANALYTICS_PATH}"
+    )
+    return table
+
+
+def seconds_until(at=ANALYTICS_REFRESH_AT, now=None):
+    """Segundos até o próximo horário `HH:MM` (local)."""
+    now = now or datetime.datetime.now()
+    hour, minute = (int(part) for part in at.split(":"))
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += datetime.timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+async def refresh_loop():
+    """Job do modo servidor: atualiza agora se preciso e depois todo dia após o fechamento."""
+    table = await asyncio.to_thread(get_analytics_table)
+    if table is None or table.age() > ANALYTICS_MAX_AGE_SECONDS:
+        await _arefresh()
+    while True:
+        await asyncio.sleep(seconds_until())
+        await _arefresh()
+
+
+async def _arefresh():
+    try:
+        await asyncio.to_thread(refresh)
+    except Exception as e:
+        log.error(f"{Colors.FAIL}❌ [Analytics] Falha na atualização: {e}{Colors.ENDC}")
@@ -0,0 +1,49 @@
+"""Event loop de fundo do processo: versão síncrona das corrotinas.
+
+Nós do grafo, pool do Gemini e validação de links são escritos uma vez, como
+corrotinas. O caminho síncrono (CLI com `app.stream`, `app.invoke`) roda essas
+corrotinas neste loop, que fica de pé entre um relatório e outro com o
+cliente HTTP compartilhado. O contexto de quem chama (métricas da execução,
+empresa do log, config do LangGraph) segue junto com a corrotina.
+"""
+
+import asyncio
+import functools
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_background_loop():
+    """Event loop único em uma thread daemon, com o cliente HTTP compartilhado."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            from .links import open_shared_client
+
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="olimpia-loop", daemon=True).start()
+
+            async def setup():
+                open_shared_client()
+
+            asyncio.run_coroutine_threadsafe(setup(), loop).result()
+            _loop = loop
+        return _loop
+
+
+def run_sync(coro):
+    """Roda a corrotina no loop de fundo e espera o resultado (bloqueia a thread atual)."""
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop()).result()
+
+
+def sync_node(afunc):
+    """Versão síncrona de um nó assíncrono do grafo (mesma lógica, um só código)."""
+
+    @functools.wraps(afunc)
+    def node(state):
+        return run_sync(afunc(state))
+
+    node.__name__ = afunc.__name__.removeprefix("a")
+    return node
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+
+from .cache import get_llm_cache
+from .checkpoint import aclose_checkpointer, arun_input, run_input, thread_config
+from .config import Colors
+from .links import close_shared_client, open_shared_client
+from .llm import get_llm_pool
+from .log import report_context
+from .market_data import validation_stats
+from .metrics import aggregate_profiles, print_stage_percentiles, track_run
+
+
+def read_companies(path):
+    """Lê a lista de empresas de um arquivo (ou stdin com '-'), uma por linha."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    companies = []
+    seen = set()
+    for line in lines:
+        # Ignora linhas vazias e comentários
+        name = line.split("#", 1)[0].strip()
+        if not name or name.upper() in seen:
+            continue
+        seen.add(name.upper())
+        companies.append(name)
+    return companies
+
+
+def _report_filename(company, ticker, used):
+    """Nome do arquivo do relatório: ticker sem '.SA' ou slug da empresa."""
+    if ticker and ticker != "N/A":
+        base = ticker.replace(".SA", "")
+    else:
+        base = re.sub(r"[^A-Za-z0-9]+", "_", company).strip("_").upper() or "EMPRESA"
+
+    name = base
+    suffix = 2
+    while name in used:
+        name = f"{base}_{suffix}"
+        suffix += 1
+    used.add(name)
+    return f"{name}.md"
+
+
+def _result(company, start, run, res=None, error=None):
+    if error is None:
+        result = {
+            "company": company,
+            "ticker": res.get("ticker", "N/A"),
+            "status": "ok",
+            "source": res.get("report_source", ""),
+            "report": res.get("final_report", ""),
+        }
+    else:
+        result = {
+            "company": company,
+            "ticker": "N/A",
+            "status": "erro",
+            "error": str(error),
+            "report": "",
+        }
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    result["profile"] = run.to_dict()
+    return result
+
+
+def run_report(app, company, refresh=False, peers=False):
+    """Um relatório completo com métricas; erros viram `status: erro`."""
+    start = time.perf_counter()
+    res, error = None, None
+    with track_run(company) as run, report_context(company):
+        try:
+            config = thread_config(company, refresh=refresh, peers=peers)
+            res = app.invoke(run_input(app, company, config), config)
+        except Exception as e:
+            error = e
+    return _result(company, start, run, res, error)
+
+
+async def arun_report(app, company, refresh=False, peers=False):
+    """Versão assíncrona de `run_report` (`app` de `workflow.get_async_app`)."""
+    start = time.perf_counter()
+    res, error = None, None
+    with track_run(company) as run, report_context(company):
+        try:
+            config = thread_config(company, refresh=refresh, peers=peers)
+            res = await app.ainvoke(await arun_input(app, company, config), config)
+        except Exception as e:
+            error = e
+    return _result(company, start, run, res, error)
+
+
+async def _arun_all(companies, workers, refresh, peers, on_result):
+    """Roda os relatórios em um único event loop, no máximo `workers` ao mesmo tempo."""
+    from .workflow import get_async_app
+
+    app = await get_async_app()
+    open_shared_client()
+    limit = asyncio.Semaphore(max(1, workers))
+
+    async def one(company):
+        async with limit:
+            return await arun_report(app, company, refresh, peers)
+
+    try:
+        for next_done in asyncio.as_completed([one(c) for c in companies]):
+            on_result(await next_done)
+    finally:
+        await close_shared_client()
+        await aclose_checkpointer()
+
+
+def run_batch(companies, workers=4, out_dir="relatorios", refresh=False, peers=False):
+    """Executa o grafo para uma lista de empresas com `workers` relatórios simultâneos.
+
+    Todos os relatórios rodam no mesmo event loop (nós assíncronos); o app
+    compilado, os imports e as conexões HTTP são reaproveitados entre as
+    empresas e a concorrência por backend é limitada em `utils`.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    print(
+        f"{Colors.HEADER}📦 [Batch]{Colors.ENDC} {len(companies)} empresas com {workers} workers → {out_dir}/"
+    )
+
+    batch_start = time.perf_counter()
+    results = []
+    used_names = set()
+
+    def save(result):
+        report = result.pop("report")
+        if result["status"] == "ok" and report:
+            filename = _report_filename(result["company"], result["ticker"], used_names)
+            with open(os.path.join(out_dir, filename), "w", encoding="utf-8") as f:
+                f.write(report)
+            result["file"] = filename
+        results.append(result)
+
+    asyncio.run(_arun_all(companies, workers, refresh, peers, save))
+
+    total = round(time.perf_counter() - batch_start, 2)
+    failures = [r for r in results if r["status"] != "ok"]
+    durations = sorted(r["seconds"] for r in results)
+
+    summary = {
+        "total_seconds": total,
+        "companies": len(companies),
+        "ok": len(results) - len(failures),
+        "failures": len(failures),
+        "workers": workers,
+        "mean_seconds": round(sum(durations) / len(durations), 2) if durations else 0,
+        "max_seconds": durations[-1] if durations else 0,
+        # p50/p95 por etapa do grafo e por backend externo
+        "percentiles": aggregate_profiles([r["profile"] for r in results]),
+        "ticker_validation_cache": validation_stats(),
+        "gemini_keys": get_llm_pool().stats(),
+        "llm_cache": get_llm_cache().stats(),
+        # Mantém a ordem da lista de entrada no resumo
+        "results": sorted(results, key=lambda r: companies.index(r["company"])),
+    }
+    with open(os.path.join(out_dir, "resumo.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print_batch_summary(summary)
+    return summary
+
+
+def print_batch_summary(summary):
+    """Imprime a tabela de tempos e falhas do batch."""
+    print(f"\n{Colors.GREEN}{'=' * 60}{Colors.ENDC}")
+    print(f"{Colors.BOLD}{'EMPRESA':<25} {'TICKER':<10} {'STATUS':<8} {'TEMPO':>8}{Colors.ENDC}")
+    for r in summary["results"]:
+        color = Colors.GREEN if r["status"] == "ok" else Colors.FAIL
+        print(
+            f"{r['company'][:25]:<25} {r['ticker']:<10} {color}{r['status']:<8}{Colors.ENDC} {r['seconds']:>7.2f}s"
+        )
+    print(f"{Colors.GREEN}{'=' * 60}{Colors.ENDC}")
+    print(
+        f"✅ {summary['ok']} ok | ❌ {summary['failures']} falhas | ⏱️  {summary['total_seconds']:.2f}s no total "
+        f"(média {summary['mean_seconds']:.2f}s por empresa)"
+    )
+    v = summary["ticker_validation_cache"]
+    print(
+        f"🗂️  Validação de tickers: {v['hits']} hits em memória, {v['disk_hits']} no disco, "
+        f"{v['network_checks']} consultas ao yfinance"
+    )
+    c = summary["llm_cache"]
+    print(
+        f"💬 Cache do Gemini: {c['hits']} respostas reaproveitadas, {c['misses']} chamadas "
+        f"({c['size']} no disco)"
+    )
+    print_stage_percentiles(summary["percentiles"])
+    for k in summary["gemini_keys"]:
+        print(
+            f"🔑 Gemini {k['key']}: {k['requests']} req | {k['ok']} ok | "
+            f"{k['throttled']} 429 | {k['errors']} erros"
+        )
+    for r in summary["results"]:
+        if r["status"] != "ok":
+            print(f"   {Colors.FAIL}✗ {r['company']}: {r.get('error', '')[:100]}{Colors.ENDC}")
@@ -0,0 +1,437 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from .config import CACHE_DIR, LLM_CACHE_MAX_ENTRIES
+
+_BAR_COLUMNS = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Adj Close": "adj_close",
+    "Volume": "volume",
+    "Dividends": "dividends",
+    "Stock Splits": "splits",
+}
+
+
+MISSING = object()
+
+
+class TTLCache:
+    """Cache em memória com TTL, thread-safe e com contadores de hit/miss.
+
+    Valores "falsos" (ex: ticker inválido) usam `negative_ttl`, o que permite
+    guardar também os resultados negativos.
+    """
+
+    def __init__(self, ttl, negative_ttl=None, maxsize=4096):
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] > time.time():
+                self.hits += 1
+                return item[0]
+            self._data.pop(key, None)
+            self.misses += 1
+            return MISSING
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl if value else self.negative_ttl
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                # Descarta o item que expira primeiro
+                oldest = min(self._data, key=lambda k: self._data[k][1])
+                del self._data[oldest]
+            self._data[key] = (value, time.time() + ttl)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "size": len(self._data),
+            }
+
+
+class SqliteStore:
+    """Conexão SQLite compartilhada entre threads (um arquivo por cache)."""
+
+    def __init__(self, filename):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.path = os.path.join(CACHE_DIR, filename)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def execute(self, sql, params=()):
+        with self._lock:
+            with self._conn:
+                return self._conn.execute(sql, params).fetchall()
+
+    def executemany(self, sql, rows):
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(sql, rows)
+
+    def executescript(self, sql):
+        with self._lock:
+            self._conn.executescript(sql)
+
+
+class MarketCache(SqliteStore):
+    """Cache em disco de barras diárias, dividendos, .info e cotações."""
+
+    def __init__(self, filename="market.db"):
+        super().__init__(filename)
+        self.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS bars (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL,
+                adj_close REAL, volume REAL, dividends REAL, splits REAL,
+                PRIMARY KEY (ticker, date)
+            );
+            CREATE TABLE IF NOT EXISTS history_log (
+                ticker TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL,
+                full_fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS info (
+                ticker TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS quotes (
+                ticker TEXT PRIMARY KEY,
+                price REAL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS validations (
+                ticker TEXT PRIMARY KEY,
+                valid INTEGER NOT NULL,
+                checked_at REAL NOT NULL
+            );
+            """
+        )
+
+    # --- Histórico diário ---
+    def history_status(self, ticker):
+        """Retorna (fetched_at, full_fetched_at, última data) ou None."""
+        rows = self.execute(
+            "SELECT fetched_at, full_fetched_at FROM history_log WHERE ticker = ?",
+            (ticker,),
+        )
+        if not rows:
+            return None
+        last = self.execute("SELECT MAX(date) FROM bars WHERE ticker = ?", (ticker,))
+        return rows[0][0], rows[0][1], last[0][0]
+
+    def tracked_tickers(self):
+        """Tickers com histórico guardado (já pedidos ao menos uma vez)."""
+        return [row[0] for row in self.execute("SELECT ticker FROM history_log ORDER BY ticker")]
+
+    def load_history(self, ticker, since=None):
+        sql = "SELECT * FROM bars WHERE ticker = ?"
+        params = [ticker]
+        if since is not None:
+            sql += " AND date >= ?"
+            params.append(pd.Timestamp(since).strftime("%Y-%m-%d"))
+        with self._lock:
+            df = pd.read_sql_query(sql + " ORDER BY date", self._conn, params=params)
+        df.index = pd.to_datetime(df.pop("date"))
+        df = df.drop(columns="ticker").rename(columns={v: k for k, v in _BAR_COLUMNS.items()})
+        return df[list(_BAR_COLUMNS)]
+
+    def store_history(self, ticker, hist, full):
+        """Grava as barras; `full=True` substitui todo o histórico do ticker."""
+        now = time.time()
+        rows = [
+            (ticker, idx.strftime("%Y-%m-%d"), *[_nan_to_none(row[c]) for c in _BAR_COLUMNS])
+            for idx, row in hist.iterrows()
+        ]
+        with self._lock:
+            with self._conn:
+                if full:
+                    self._conn.execute("DELETE FROM bars WHERE ticker = ?", (ticker,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                prev = self._conn.execute(
+                    "SELECT full_fetched_at FROM history_log WHERE ticker = ?", (ticker,)
+                ).fetchall()
+                full_at = now if full or not prev else prev[0][0]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO history_log VALUES (?, ?, ?)",
+                    (ticker, now, full_at),
+                )
+
+    # --- .info ---
+    def get_info(self, ticker, ttl):
+        rows = self.execute("SELECT data, fetched_at FROM info WHERE ticker = ?", (ticker,))
+        if rows and time.time() - rows[0][1] < ttl:
+            return json.loads(rows[0][0])
+        return None
+
+    def store_info(self, ticker, info):
+        self.execute(
+            "INSERT OR REPLACE INTO info VALUES (?, ?, ?)",
+            (ticker, json.dumps(info, default=str), time.time()),
+        )
+
+    # --- Cotação intradiária ---
+    def get_quote(self, ticker, ttl):
+        rows = self.execute("SELECT price, fetched_at FROM quotes WHERE ticker = ?", (ticker,))
+        if rows and time.time() - rows[0][1] < ttl:
+            return rows[0][0]
+        return None
+
+    def store_quote(self, ticker, price):
+        self.execute(
+            "INSERT OR REPLACE INTO quotes VALUES (?, ?, ?)", (ticker, price, time.time())
+        )
+
+    # --- Validação de tickers ---
+    def get_validation(self, ticker, ttl, negative_ttl):
+        """Retorna True/False se houver resultado dentro do TTL, senão None."""
+        rows = self.execute(
+            "SELECT valid, checked_at FROM validations WHERE ticker = ?", (ticker,)
+        )
+        if not rows:
+            return None
+        valid, checked_at = bool(rows[0][0]), rows[0][1]
+        if time.time() - checked_at < (ttl if valid else negative_ttl):
+            return valid
+        return None
+
+    def store_validation(self, ticker, valid):
+        self.execute(
+            "INSERT OR REPLACE INTO validations VALUES (?, ?, ?)",
+            (ticker, int(bool(valid)), time.time()),
+        )
+
+
+class UrlStatusCache(SqliteStore):
+    """Status HTTP, destino final do redirect e horário da última checagem."""
+
+    def __init__(self, filename="urls.db"):
+        super().__init__(filename)
+        self.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS url_status (
+                url TEXT PRIMARY KEY,
+                status INTEGER,
+                final_url TEXT,
+                checked_at REAL NOT NULL
+            );
+            """
+        )
+
+    def get_many(self, urls, ok_ttl, fail_ttl):
+        """{url: (status, final_url)} para as URLs ainda dentro do TTL."""
+        now = time.time()
+        found = {}
+        urls = list(dict.fromkeys(urls))
+        for i in range(0, len(urls), 500):
+            chunk = urls[i : i + 500]
+            rows = self.execute(
+                f"SELECT url, status, final_url, checked_at FROM url_status "
+                f"WHERE url IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for url, status, final_url, checked_at in rows:
+                ok = status is not None and status < 400
+                if now - checked_at < (ok_ttl if ok else fail_ttl):
+                    found[url] = (status, final_url)
+        return found
+
+    def store_many(self, results):
+        """Grava [(url, status, final_url)]; status None indica erro de rede."""
+        now = time.time()
+        self.executemany(
+            "INSERT OR REPLACE INTO url_status VALUES (?, ?, ?, ?)",
+            [(url, status, final_url, now) for url, status, final_url in results],
+        )
+
+
+class SearchCache(SqliteStore):
+    """Resultados de busca por (backend, query, região, período, quantidade)."""
+
+    def __init__(self, filename="search.db"):
+        super().__init__(filename)
+        self.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS search_results (
+                key TEXT PRIMARY KEY,
+                backend TEXT NOT NULL,
+                query TEXT NOT NULL,
+                results TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            """
+        )
+
+    @staticmethod
+    def make_key(backend, query, region, timelimit, max_results):
+        raw = json.dumps([backend, query, region, timelimit, max_results])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key, ttl):
+        rows = self.execute(
+            "SELECT results, fetched_at FROM search_results WHERE key = ?", (key,)
+        )
+        if rows and time.time() - rows[0][1] < ttl:
+            return json.loads(rows[0][0])
+        return None
+
+    def store(self, key, backend, query, results):
+        self.execute(
+            "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?, ?)",
+            (key, backend, query, json.dumps(results, ensure_ascii=False), time.time()),
+        )
+
+
+class LLMCache(SqliteStore):
+    """Respostas do Gemini endereçadas por hash de (modelo, temperatura, prompt).
+
+    Tem validade (TTL) e limite de tamanho: ao passar de `max_entries`, as
+    respostas usadas há mais tempo são descartadas (LRU).
+    """
+
+    def __init__(self, filename="llm.db", max_entries=1000):
+        super().__init__(filename)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                temperature REAL NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS llm_responses_lru ON llm_responses (last_used_at);
+            """
+        )
+
+    @staticmethod
+    def make_key(model, temperature, prompt):
+        raw = json.dumps([model, float(temperature), prompt], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            rows = self.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            )
+            if rows and now - rows[0][1] < ttl:
+                self.execute(
+                    "UPDATE llm_responses SET last_used_at = ? WHERE key = ?", (now, key)
+                )
+                self.hits += 1
+                return rows[0][0]
+            self.misses += 1
+            return None
+
+    def store(self, key, model, temperature, response):
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, float(temperature), response, now, now),
+                )
+                # Mantém só as `max_entries` respostas usadas mais recentemente
+                self._conn.execute(
+                    "DELETE FROM llm_responses WHERE key IN ("
+                    " SELECT key FROM llm_responses ORDER BY last_used_at DESC"
+                    " LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            size = self.execute("SELECT COUNT(*) FROM llm_responses")[0][0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "size": size,
+            }
+
+
+def _nan_to_none(value):
+    return None if pd.isna(value) else float(value)
+
+
+_market_cache = None
+_instances_lock = threading.Lock()
+
+
+def get_market_cache():
+    """Instância única (lazy) do cache de mercado."""
+    global _market_cache
+    with _instances_lock:
+        if _market_cache is None:
+            _market_cache = MarketCache()
+        return _market_cache
+
+
+_url_cache = None
+
+
+def get_url_cache():
+    """Instância única (lazy) do cache de status de URLs."""
+    global _url_cache
+    with _instances_lock:
+        if _url_cache is None:
+            _url_cache = UrlStatusCache()
+        return _url_cache
+
+
+_search_cache = None
+
+
+def get_search_cache():
+    """Instância única (lazy) do cache de buscas."""
+    global _search_cache
+    with _instances_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+        return _search_cache
+
+
+_llm_cache = None
+
+
+def get_llm_cache():
+    """Instância única (lazy) do cache de respostas do Gemini."""
+    global _llm_cache
+    with _instances_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache(max_entries=LLM_CACHE_MAX_ENTRIES)
+        return _llm_cache
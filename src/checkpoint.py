@@ -0,0 +1,200 @@
+import asyncio
+import datetime
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from zoneinfo import ZoneInfo
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from .config import CACHE_DIR, NODE_TTL_SECONDS, Colors
+from .log import log
+from .ticker_index import get_ticker_index, normalize
+
+_B3_TZ = ZoneInfo("America/Sao_Paulo")
+
+# Nós que alimentam o Editor (se algum rodar de novo, o relatório fica velho)
+_EDITOR_INPUTS = ("TickerFinder", "Researcher", "MarketAnalyst")
+
+
+def trading_date(now=None):
+    """Data do pregão de referência (fins de semana voltam para sexta)."""
+    day = (now or datetime.datetime.now(_B3_TZ)).date()
+    while day.weekday() >= 5:
+        day -= datetime.timedelta(days=1)
+    return day
+
+
+def thread_config(company, refresh=False, peers=False):
+    """Config do LangGraph com thread_id = empresa normalizada + data do pregão.
+
+    `refresh=True` ignora os resultados salvos e roda todos os nós de novo;
+    `peers=True` (comparação setorial) usa uma thread separada.
+    """
+    key = normalize(company).replace(" ", "_") or "EMPRESA"
+    if peers:
+        key = f"PEERS:{key}"
+    return {
+        "configurable": {
+            "thread_id": f"{key}:{trading_date().isoformat()}",
+            "refresh": refresh,
+            "peers": peers,
+        }
+    }
+
+
+def _sector_company(company):
+    """Nome de setor ("Petróleo e Gás") vira o nome da primeira empresa do setor.
+
+    O título, as buscas do Researcher e o prompt do Editor falam dessa
+    empresa; a tabela da comparação setorial traz o restante do setor.
+    """
+    index = get_ticker_index()
+    sector = index.find_sector(company)
+    if not sector:
+        return company
+    entry = index.entry_for(index.sector_members(sector)[0])
+    name = entry.get("trade_name") or entry["name"]
+    log.info(f"{Colors.GREEN}🏭 Setor {sector}:{Colors.ENDC} {name}")
+    return name
+
+
+def _input(company, config):
+    peers = bool(config["configurable"].get("peers"))
+    if peers:
+        company = _sector_company(company)
+    return {"company_name": company, "peer_mode": peers}
+
+
+def run_input(app, company, config):
+    """Entrada do `invoke`/`stream`: None retoma uma execução interrompida.
+
+    Se o último checkpoint da thread ainda tem nós pendentes (ex: o processo
+    caiu no meio), a execução continua de onde parou; senão começa do início
+    e os nós ainda válidos são pulados por `checkpointed`.
+    """
+    if not config["configurable"].get("refresh"):
+        snapshot = app.get_state(config)
+        if snapshot.next:
+            return None
+    return _input(company, config)
+
+
+async def arun_input(app, company, config):
+    """Versão assíncrona de `run_input` (para `ainvoke`/`astream`)."""
+    if not config["configurable"].get("refresh"):
+        snapshot = await app.aget_state(config)
+        if snapshot.next:
+            return None
+    return _input(company, config)
+
+
+def _is_fresh(name, state, now):
+    updated_at = state.get("updated_at") or {}
+    stamp = updated_at.get(name)
+    if stamp is None or now - stamp > NODE_TTL_SECONDS[name]:
+        return False
+    if name == "Editor":
+        # O relatório só vale se for mais novo que todos os insumos (um
+        # insumo que rodou de novo sem resultado completo fica com None)
+        stamps = [updated_at.get(n, 0) for n in _EDITOR_INPUTS]
+        return all(s is not None and s <= stamp for s in stamps)
+    return True
+
+
+def _reuse(name, state, config):
+    """True (e avisa) quando o resultado salvo do nó ainda vale."""
+    now = time.time()
+    refresh = (config.get("configurable") or {}).get("refresh")
+    if refresh or not _is_fresh(name, state, now):
+        return False
+    age = int(now - state["updated_at"][name])
+    log.info(
+        f"{Colors.BLUE}♻️  [{name}]{Colors.ENDC} Reaproveitado do checkpoint (há {age // 60} min)."
+    )
+    return True
+
+
+def _stamp(name, update, is_complete):
+    """Marca o horário do resultado completo; um incompleto apaga a marca anterior.
+
+    Sem apagar, o resultado incompleto substituiria o do estado enquanto o
+    nó (e o Editor, que o usou) continuariam contando como recentes.
+    """
+    stamp = time.time() if is_complete(update) else None
+    return {**update, "updated_at": {name: stamp}}
+
+
+def checkpointed(name, func, is_complete=lambda update: True):
+    """Envolve um nó para pular a execução quando o resultado salvo é recente.
+
+    Depois de rodar, o nó só é marcado como atualizado se `is_complete(update)`
+    for verdadeiro (ex: o Editor só conta quando a IA gerou o relatório).
+    """
+
+    def run(state, config):
+        if _reuse(name, state, config):
+            return {}
+        return _stamp(name, func(state), is_complete)
+
+    run.__name__ = func.__name__
+    return run
+
+
+def acheckpointed(name, afunc, is_complete=lambda update: True):
+    """Versão de `checkpointed` para nós assíncronos."""
+
+    async def arun(state, config):
+        if _reuse(name, state, config):
+            return {}
+        return _stamp(name, await afunc(state), is_complete)
+
+    arun.__name__ = afunc.__name__
+    return arun
+
+
+_saver = None
+_saver_lock = threading.Lock()
+
+
+def get_checkpointer():
+    """SqliteSaver único do processo, em CACHE_DIR/checkpoints.db."""
+    global _saver
+    with _saver_lock:
+        if _saver is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(CACHE_DIR, "checkpoints.db"), check_same_thread=False
+            )
+            _saver = SqliteSaver(conn)
+        return _saver
+
+
+_async_savers = weakref.WeakKeyDictionary()
+
+
+async def aget_checkpointer():
+    """AsyncSqliteSaver do event loop atual, no mesmo checkpoints.db.
+
+    A conexão do aiosqlite pertence ao loop que a abriu, então cada loop de
+    longa duração (servidor, batch) tem o seu.
+    """
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    loop = asyncio.get_running_loop()
+    if loop not in _async_savers:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = await aiosqlite.connect(os.path.join(CACHE_DIR, "checkpoints.db"))
+        # Outra corrotina pode ter aberto a conexão enquanto esta esperava
+        if _async_savers.setdefault(loop, AsyncSqliteSaver(conn)).conn is not conn:
+            await conn.close()
+    return _async_savers[loop]
+
+
+async def aclose_checkpointer():
+    saver = _async_savers.pop(asyncio.get_running_loop(), None)
+    if saver is not None:
+        await saver.conn.close()
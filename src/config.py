@@ -1,15 +1,7 @@
 import os
-import warnings
 
-from dotenv import load_dotenv
-
-# Carrega variáveis de ambiente do arquivo .env
-load_dotenv()
-
-# Configurações de Silenciamento de Logs
-warnings.filterwarnings("ignore")
-os.environ["GRPC_VERBOSITY"] = "ERROR"
-os.environ["GLOG_minloglevel"] = "2"
+# As variáveis do .env são carregadas por `src.env.load_env()` no ponto de
+# entrada, antes deste módulo ser importado.
 
 
 # Classe de Cores ANSI
@@ -23,3 +15,102 @@ class Colors:
     ENDC = "\033[0m"
     BOLD = "\033[1m"
     UNDERLINE = "\033[4m"
+
+# Limites de concorrência por backend (usados principalmente no modo batch)
+MAX_CONCURRENCY = {
+    "ddg": int(os.getenv("OLIMPIA_MAX_DDG", "4")),
+    "google": int(os.getenv("OLIMPIA_MAX_GOOGLE", "2")),
+    "yfinance": int(os.getenv("OLIMPIA_MAX_YFINANCE", "4")),
+    "gemini": int(os.getenv("OLIMPIA_MAX_GEMINI", "2")),
+}
+
+# Janela (s) para agrupar pedidos de histórico simultâneos em um único yf.download
+BULK_WINDOW_SECONDS = float(os.getenv("OLIMPIA_BULK_WINDOW", "0.05"))
+
+# Cache local (SQLite) de dados de mercado
+CACHE_DIR = os.getenv("OLIMPIA_CACHE_DIR", ".cache")
+# Barras diárias: após esse tempo o histórico de 1 ano é baixado de novo
+HISTORY_TTL_SECONDS = int(os.getenv("OLIMPIA_HISTORY_TTL", str(24 * 3600)))
+# Cotação intradiária: após esse tempo só as barras novas são buscadas
+QUOTE_TTL_SECONDS = int(os.getenv("OLIMPIA_QUOTE_TTL", "300"))
+# Campos do .info (setor, nome, DY da API...)
+INFO_TTL_SECONDS = int(os.getenv("OLIMPIA_INFO_TTL", str(24 * 3600)))
+
+# Snapshot local das listagens da B3 (JSON ou CSV) usado pelo índice de tickers
+TICKER_INDEX_PATH = os.getenv(
+    "OLIMPIA_TICKER_INDEX",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "b3_tickers.json"),
+)
+
+# Cache de validação de tickers (positivos e negativos)
+VALIDATION_TTL_SECONDS = int(os.getenv("OLIMPIA_VALIDATION_TTL", str(7 * 24 * 3600)))
+VALIDATION_NEGATIVE_TTL_SECONDS = int(os.getenv("OLIMPIA_VALIDATION_NEGATIVE_TTL", str(24 * 3600)))
+
+# Validação de links do Researcher
+LINK_CHECK_CONCURRENCY = int(os.getenv("OLIMPIA_LINK_CONCURRENCY", "10"))
+LINK_CHECK_PER_HOST = int(os.getenv("OLIMPIA_LINK_PER_HOST", "2"))
+# Quantos links válidos bastam para a curadoria (o restante é cancelado)
+LINK_CHECK_TARGET = int(os.getenv("OLIMPIA_LINK_TARGET", "8"))
+# Cache de status de URLs (sucesso e falha têm validades diferentes)
+URL_OK_TTL_SECONDS = int(os.getenv("OLIMPIA_URL_OK_TTL", str(6 * 3600)))
+URL_FAIL_TTL_SECONDS = int(os.getenv("OLIMPIA_URL_FAIL_TTL", str(30 * 60)))
+
+# Cache de buscas (DDG / Google CSE): validade por tipo de consulta
+SEARCH_TTL_SECONDS = {
+    "summary": int(os.getenv("OLIMPIA_SEARCH_TTL_SUMMARY", str(3 * 24 * 3600))),
+    "news": int(os.getenv("OLIMPIA_SEARCH_TTL_NEWS", "3600")),
+    "ticker": int(os.getenv("OLIMPIA_SEARCH_TTL_TICKER", str(7 * 24 * 3600))),
+}
+
+# Pool de chaves do Gemini
+GEMINI_MODEL = os.getenv("OLIMPIA_GEMINI_MODEL", "gemini-2.5-flash")
+# Requisições por minuto permitidas por chave (token bucket)
+GEMINI_RPM_PER_KEY = float(os.getenv("OLIMPIA_GEMINI_RPM", "10"))
+# Pausa de uma chave após 429/RESOURCE_EXHAUSTED (quando a API não informa o retry)
+GEMINI_COOLDOWN_SECONDS = float(os.getenv("OLIMPIA_GEMINI_COOLDOWN", "60"))
+# Espera máxima (s) por uma chave quando todas estão em cooldown
+GEMINI_MAX_WAIT_SECONDS = float(os.getenv("OLIMPIA_GEMINI_MAX_WAIT", "30"))
+
+# Cache de respostas do Gemini (chave = hash de modelo, temperatura e prompt)
+LLM_CACHE_TTL_SECONDS = int(os.getenv("OLIMPIA_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("OLIMPIA_LLM_CACHE_MAX", "1000"))
+
+# Orçamento (tokens estimados) de cada prompt enviado ao Gemini
+PROMPT_BUDGET_TOKENS = {
+    "editor": int(os.getenv("OLIMPIA_PROMPT_BUDGET_EDITOR", "1500")),
+    "news": int(os.getenv("OLIMPIA_PROMPT_BUDGET_NEWS", "600")),
+}
+
+# Checkpoints do grafo: por quanto tempo o resultado de cada nó é reaproveitado
+NODE_TTL_SECONDS = {
+    "TickerFinder": int(os.getenv("OLIMPIA_TTL_TICKER", str(7 * 24 * 3600))),
+    "Researcher": int(os.getenv("OLIMPIA_TTL_RESEARCHER", "3600")),
+    "MarketAnalyst": int(os.getenv("OLIMPIA_TTL_MARKET", "300")),
+    "Editor": int(os.getenv("OLIMPIA_TTL_EDITOR", str(24 * 3600))),
+}
+
+# Perfis de execução (JSON com tempos por nó e por backend externo)
+PROFILE_DIR = os.getenv("OLIMPIA_PROFILE_DIR", os.path.join(CACHE_DIR, "profiles"))
+
+# Modo servidor (`main.py --serve`): endereço e relatórios simultâneos
+SERVER_HOST = os.getenv("OLIMPIA_SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("OLIMPIA_SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("OLIMPIA_SERVER_WORKERS", "32"))
+
+# Log de progresso dos nós: nível (DEBUG, INFO, WARNING...) e formato (text ou json)
+LOG_LEVEL = os.getenv("OLIMPIA_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("OLIMPIA_LOG_FORMAT", "text").lower()
+
+# Tabela de métricas pré-calculadas (src/analytics.py)
+ANALYTICS_PATH = os.getenv("OLIMPIA_ANALYTICS_PATH", os.path.join(CACHE_DIR, "analytics.npz"))
+# Idade máxima da tabela para o Market Analyst usá-la (cobre o intervalo entre pregões)
+ANALYTICS_MAX_AGE_SECONDS = int(os.getenv("OLIMPIA_ANALYTICS_MAX_AGE", str(36 * 3600)))
+# Horário (local) da atualização diária no modo servidor, após o fechamento da B3
+ANALYTICS_REFRESH_AT = os.getenv("OLIMPIA_ANALYTICS_REFRESH_AT", "18:30")
+# Tickers por yf.download durante a atualização
+ANALYTICS_CHUNK = int(os.getenv("OLIMPIA_ANALYTICS_CHUNK", "50"))
+# Sobrepõe o último preço (cotação com TTL curto) às métricas da tabela
+ANALYTICS_LIVE_PRICE = os.getenv("OLIMPIA_ANALYTICS_LIVE_PRICE", "1") not in ("0", "false", "no")
+
+# Modo comparação setorial: máximo de ativos na tabela (incluindo o principal)
+PEER_LIMIT = int(os.getenv("OLIMPIA_PEER_LIMIT", "8"))
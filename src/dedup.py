@@ -0,0 +1,147 @@
+"""Deduplicação de notícias: URLs canônicas e quase-duplicatas por SimHash.
+
+A mesma matéria aparece com parâmetros de rastreamento, em versões AMP/mobile
+ou republicada por outros portais. Cada grupo entra uma única vez na lista de
+candidatos, o que poupa checagens de link e tokens no prompt. A URL canônica
+é só a chave de comparação: o item mantém o link devolvido pela busca.
+"""
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .ranking import tokenize
+from .ticker_index import get_ticker_index
+
+# Parâmetros de rastreamento removidos da URL
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "cmpid", "source", "origin", "amp", "outputtype",
+}
+TRACKING_PREFIXES = ("utm_", "__twitter", "_hs", "pk_")
+
+# Prefixos de host equivalentes (www.x.com, m.x.com, amp.x.com -> x.com)
+HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+# Distância de Hamming máxima (em 64 bits) para considerar duas notícias iguais
+SIMHASH_DISTANCE = 8
+# Títulos reescritos (ordem/palavras trocadas): Jaccard mínimo entre os termos,
+# só para títulos com pelo menos MIN_TITLE_TERMS termos
+TITLE_JACCARD = 0.6
+MIN_TITLE_TERMS = 3
+
+_AMP_PATH_RE = re.compile(r"(?:/amp/?|\.amp)$")
+# Sufixo com o portal no título ("... - www.infomoney.com.br", "... | Valor")
+_TITLE_SOURCE_RE = re.compile(r"\s+[-|–]\s+[^-|–]+$")
+
+
+def clean_url(url):
+    """URL sem parâmetros de rastreamento, fragmento e sufixo AMP (para comparação)."""
+    parts = urlsplit(url.strip())
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = _AMP_PATH_RE.sub("", parts.path) or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def canonical_url(url):
+    """Chave de comparação: `clean_url` sem www/m/amp no host nem barra final."""
+    parts = urlsplit(clean_url(url))
+    host = parts.netloc
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{parts.query}" if parts.query else "")
+
+
+def _hash64(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(title, body=""):
+    """SimHash de 64 bits sobre os termos do título (peso 2) e do resumo."""
+    weights = {}
+    for token in tokenize(_TITLE_SOURCE_RE.sub("", title)):
+        weights[token] = weights.get(token, 0) + 2
+    for token in tokenize(body):
+        weights[token] = weights.get(token, 0) + 1
+
+    vector = [0] * 64
+    for token, weight in weights.items():
+        h = _hash64(token)
+        for bit in range(64):
+            vector[bit] += weight if h >> bit & 1 else -weight
+    return sum(1 << bit for bit in range(64) if vector[bit] > 0)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def title_terms(title):
+    """Termos do título sem o portal e sem palavras de até 2 letras (exceto números)."""
+    return {
+        t for t in tokenize(_TITLE_SOURCE_RE.sub("", title)) if len(t) > 2 or t.isdigit()
+    }
+
+
+def title_numbers(title):
+    """Números do título (valores, percentuais, anos): "R$ 2,7 bi" -> {"2", "7"}."""
+    return {t for t in tokenize(_TITLE_SOURCE_RE.sub("", title)) if t.isdigit()}
+
+
+def title_companies(title):
+    """Empresas citadas no título, pelo índice da B3 ("Vale anuncia..." -> {"VALE3"})."""
+    return get_ticker_index().mentions(_TITLE_SOURCE_RE.sub("", title))
+
+
+def jaccard(a, b):
+    if min(len(a), len(b)) < MIN_TITLE_TERMS:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicates:
+    """Guarda as URLs canônicas, os SimHashes e os termos dos títulos já vistos.
+
+    Com poucas dezenas de candidatos a comparação é feita contra todos (o
+    Jaccard exato é o que um MinHash apenas estimaria). Manchetes padronizadas
+    que só diferem nos números ("lucro sobe 10%" / "lucro sobe 12%") ou na
+    empresa ("Vale anuncia dividendos" / "Itaú anuncia dividendos") são
+    notícias diferentes: números e empresas citadas precisam ser os mesmos.
+    """
+
+    def __init__(self, distance=SIMHASH_DISTANCE, min_jaccard=TITLE_JACCARD):
+        self.distance = distance
+        self.min_jaccard = min_jaccard
+        self._urls = set()
+        self._seen = []  # (simhash, termos, números e empresas do título)
+
+    def seen(self, url, title, body=""):
+        """True se a notícia repete uma anterior; senão a registra e devolve False."""
+        key = canonical_url(url)
+        if key in self._urls:
+            return True
+        fingerprint, terms = simhash(title, body), title_terms(title)
+        numbers, companies = title_numbers(title), title_companies(title)
+        for other_hash, other_terms, other_numbers, other_companies in self._seen:
+            if numbers != other_numbers or companies != other_companies:
+                continue
+            if (
+                hamming(fingerprint, other_hash) <= self.distance
+                or jaccard(terms, other_terms) >= self.min_jaccard
+            ):
+                return True
+        self._urls.add(key)
+        self._seen.append((fingerprint, terms, numbers, companies))
+        return False
+
+
+def dedupe(results):
+    """Primeiro resultado de cada grupo (com o `href` original)."""
+    seen = NearDuplicates()
+    return [r for r in results if not seen.seen(r["href"], r.get("title", ""), r.get("body", ""))]
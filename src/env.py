@@ -0,0 +1,21 @@
+import os
+import warnings
+
+
+def load_env():
+    """Carrega o .env e silencia avisos do gRPC e do `warnings`.
+
+    Fica fora de `config` para rodar antes de qualquer leitura de variável
+    (as configurações do `config` são lidas na importação). Deve ser chamada
+    no ponto de entrada, antes de importar o restante do projeto. O nível dos
+    loggers das bibliotecas (yfinance, DDGS, httpx) fica em `src/log.py`.
+    """
+    from dotenv import load_dotenv
+
+    # Carrega variáveis de ambiente do arquivo .env
+    load_dotenv()
+
+    # Configurações de Silenciamento de Logs
+    warnings.filterwarnings("ignore")
+    os.environ["GRPC_VERBOSITY"] = "ERROR"
+    os.environ["GLOG_minloglevel"] = "2"
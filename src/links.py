@@ -0,0 +1,142 @@
+import asyncio
+import contextlib
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import httpx
+
+from .background import run_sync
+from .cache import get_url_cache
+from .config import (
+    LINK_CHECK_CONCURRENCY,
+    LINK_CHECK_PER_HOST,
+    LINK_CHECK_TARGET,
+    URL_FAIL_TTL_SECONDS,
+    URL_OK_TTL_SECONDS,
+)
+from .metrics import record_cache_hit, timed_call
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+
+# Status que alguns portais devolvem para HEAD mas não para GET
+HEAD_REJECTED = {403, 405, 501}
+
+
+async def _check(client, url, timeout):
+    """(status, URL final) do link (HEAD, com fallback para GET de 1 byte).
+
+    Em erro de rede retorna (None, None).
+    """
+    try:
+        with timed_call("http_check"):
+            resp = await client.head(url, timeout=timeout)
+        if resp.status_code not in HEAD_REJECTED:
+            return resp.status_code, str(resp.url)
+        with timed_call("http_check") as call:
+            async with client.stream(
+                "GET", url, headers={"Range": "bytes=0-0"}, timeout=timeout
+            ) as resp:
+                call.bytes = int(resp.headers.get("content-length") or 0)
+                return resp.status_code, str(resp.url)
+    except (httpx.HTTPError, httpx.InvalidURL):
+        return None, None
+
+
+def _new_client(shared=False):
+    # O cliente compartilhado atende várias validações ao mesmo tempo; cada
+    # uma já é limitada pelos semáforos de `avalidate_links`
+    limits = httpx.Limits(
+        max_connections=None if shared else LINK_CHECK_CONCURRENCY,
+        max_keepalive_connections=LINK_CHECK_CONCURRENCY,
+    )
+    return httpx.AsyncClient(headers=HEADERS, follow_redirects=True, limits=limits)
+
+
+# Cliente HTTP compartilhado por event loop de longa duração (conexões e TLS
+# reaproveitados entre relatórios). Loops temporários usam um cliente próprio.
+_shared_clients = {}
+
+
+def open_shared_client():
+    """Registra um cliente persistente para o event loop atual."""
+    loop = asyncio.get_running_loop()
+    if loop not in _shared_clients:
+        _shared_clients[loop] = _new_client(shared=True)
+    return _shared_clients[loop]
+
+
+async def close_shared_client():
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def avalidate_links(items, target=LINK_CHECK_TARGET, timeout=5.0, url_key="href"):
+    """Valida os links em paralelo com limite global e por host.
+
+    Para assim que `target` links válidos forem encontrados. Retorna
+    (itens válidos na ordem original, {índice: status ou None}).
+    """
+    if not items:
+        return [], {}
+
+    statuses = {}
+    valid = set()
+
+    # Consulta o cache de status antes de qualquer chamada de rede
+    url_cache = get_url_cache()
+    cached = url_cache.get_many(
+        [item[url_key] for item in items], URL_OK_TTL_SECONDS, URL_FAIL_TTL_SECONDS
+    )
+    record_cache_hit("http_check", len({item[url_key] for item in items} & set(cached)))
+    pending = []
+    for idx, item in enumerate(items):
+        if item[url_key] in cached:
+            status = cached[item[url_key]][0]
+            statuses[idx] = status
+            if status is not None and status < 400:
+                valid.add(idx)
+        else:
+            pending.append(idx)
+
+    if len(valid) >= target or not pending:
+        return [items[i] for i in sorted(valid)], statuses
+
+    global_limit = asyncio.Semaphore(LINK_CHECK_CONCURRENCY)
+    host_limits = defaultdict(lambda: asyncio.Semaphore(LINK_CHECK_PER_HOST))
+    checked = []
+
+    async def worker(idx, url):
+        host = urlsplit(url).netloc.lower()
+        async with host_limits[host], global_limit:
+            return idx, await _check(client, url, timeout)
+
+    shared = _shared_clients.get(asyncio.get_running_loop())
+    async with contextlib.AsyncExitStack() as stack:
+        client = shared or await stack.enter_async_context(_new_client())
+        tasks = [asyncio.create_task(worker(idx, items[idx][url_key])) for idx in pending]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                idx, (status, final_url) = await next_done
+                statuses[idx] = status
+                checked.append((items[idx][url_key], status, final_url))
+                if status is not None and status < 400:
+                    valid.add(idx)
+                    if len(valid) >= target:
+                        break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    url_cache.store_many(checked)
+    return [items[i] for i in sorted(valid)], statuses
+
+
+def validate_links(items, target=LINK_CHECK_TARGET, timeout=5.0, url_key="href"):
+    """Versão síncrona de `avalidate_links` (scripts e ferramentas do bench).
+
+    Roda no loop de fundo do processo, então as conexões continuam abertas
+    entre um relatório e outro (o contexto das métricas segue junto).
+    """
+    return run_sync(avalidate_links(items, target=target, timeout=timeout, url_key=url_key))
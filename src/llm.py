@@ -0,0 +1,408 @@
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+
+from .background import run_sync
+from .cache import get_llm_cache
+from .config import (
+    GEMINI_COOLDOWN_SECONDS,
+    GEMINI_MAX_WAIT_SECONDS,
+    GEMINI_MODEL,
+    GEMINI_RPM_PER_KEY,
+    LLM_CACHE_TTL_SECONDS,
+    Colors,
+)
+from .log import log
+from .metrics import record_cache_hit, record_retry, record_tokens, timed_call
+from .prompts import estimate_tokens
+from .utils import abackend_slot
+
+# Chave inválida/bloqueada fica fora da rotação por bem mais tempo
+_AUTH_COOLDOWN_SECONDS = 3600
+# Erro transitório (5xx, timeout, rede): a chave descansa um pouco
+_TRANSIENT_COOLDOWN_SECONDS = 5
+
+
+class LLMUnavailable(Exception):
+    """Nenhuma chave conseguiu responder (cota, chave inválida ou resposta rejeitada)."""
+
+
+def _is_quota_error(error):
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text
+
+
+def _is_auth_error(error):
+    text = str(error)
+    return "API_KEY_INVALID" in text or "PERMISSION_DENIED" in text or "API key not valid" in text
+
+
+def _is_request_error(error):
+    """Erro causado pelo próprio pedido: outra chave receberia o mesmo erro."""
+    if isinstance(error, (TypeError, AttributeError, KeyError)):
+        return True
+    text = str(error)
+    return any(
+        marker in text for marker in ("400 ", "INVALID_ARGUMENT", "404 ", "NOT_FOUND")
+    ) and not _is_auth_error(error)
+
+
+def _retry_delay(error):
+    """Extrai o tempo de espera sugerido pela API (ex: 'retryDelay': '23s')."""
+    match = re.search(r"retry(?:Delay)?\D{0,12}(\d+(?:\.\d+)?)s", str(error), re.IGNORECASE)
+    return float(match.group(1)) if match else GEMINI_COOLDOWN_SECONDS
+
+
+def _add_usage(total, usage):
+    """Soma o `usage_metadata` dos pedaços de uma resposta em streaming."""
+    if not usage:
+        return total
+    total = dict(total or {})
+    for field in ("input_tokens", "output_tokens"):
+        total[field] = total.get(field, 0) + (usage.get(field) or 0)
+    return total
+
+
+def _messages(prompt):
+    from langchain_core.messages import HumanMessage
+
+    return [HumanMessage(content=prompt)]
+
+
+class _TokenBucket:
+    """Limita a taxa de requisições de uma chave (rpm tokens por minuto)."""
+
+    def __init__(self, rpm):
+        self.capacity = max(1.0, rpm)
+        self.rate = rpm / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Consome um token; retorna 0 ou quantos segundos esperar."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    async def aacquire(self):
+        while wait := self._take():
+            await asyncio.sleep(wait)
+
+
+class _KeySlot:
+    """Estado de uma chave: clientes prontos, cooldown e contadores de uso."""
+
+    def __init__(self, index, key, rpm):
+        self.index = index
+        self.key = key
+        self.bucket = _TokenBucket(rpm)
+        self.clients = {}
+        self.cooldown_until = 0.0
+        self.last_used = 0.0
+        self.last_throttled = 0.0
+        self.usage = {"requests": 0, "ok": 0, "throttled": 0, "errors": 0}
+
+
+class LLMPool:
+    """Pool compartilhado de chaves do Gemini usado por todos os nós.
+
+    Mantém um cliente pronto por chave, escolhe sempre a chave disponível que
+    foi limitada há mais tempo (e, no empate, a menos usada recentemente),
+    coloca em cooldown as chaves que recebem 429 e limita as requisições de
+    cada chave com um token bucket.
+    """
+
+    def __init__(self, keys, rpm=GEMINI_RPM_PER_KEY):
+        self.slots = [_KeySlot(i + 1, k, rpm) for i, k in enumerate(keys)]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        keys = [k.strip() for k in os.environ.get("GEMINI_API_KEY", "").split(",")]
+        return cls([k for k in keys if k])
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _pick(self, tried):
+        """Reserva a próxima chave fora de cooldown que ainda não foi tentada."""
+        with self._lock:
+            now = time.time()
+            available = [
+                s for s in self.slots if s.index not in tried and s.cooldown_until <= now
+            ]
+            if not available:
+                return None
+            slot = min(available, key=lambda s: (s.last_throttled, s.last_used))
+            slot.last_used = now
+            slot.usage["requests"] += 1
+            return slot
+
+    def _client(self, slot, model, temperature):
+        # Import tardio: o SDK do Gemini é a dependência mais pesada do projeto
+        # e não é carregado em modo mock ou quando tudo sai do cache
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        with self._lock:
+            client = slot.clients.get((model, temperature))
+            if client is None:
+                client = ChatGoogleGenerativeAI(
+                    model=model,
+                    temperature=temperature,
+                    google_api_key=slot.key,
+                    # A rotação entre chaves substitui os retries internos
+                    max_retries=0,
+                )
+                slot.clients[(model, temperature)] = client
+            return client
+
+    def warm(self, temperatures=(0.0, 0.1), model=GEMINI_MODEL):
+        """Cria de antemão os clientes de todas as chaves (modo servidor)."""
+        for slot in self.slots:
+            for temperature in temperatures:
+                self._client(slot, model, temperature)
+
+    def _record(self, slot, outcome, cooldown=0.0):
+        with self._lock:
+            slot.usage[outcome] += 1
+            if cooldown:
+                slot.last_throttled = time.time()
+                slot.cooldown_until = time.time() + cooldown
+
+    def _next_release(self, deadline):
+        """Segundos até a primeira chave sair do cooldown (None se passar do prazo)."""
+        with self._lock:
+            now = time.time()
+            ends = [s.cooldown_until for s in self.slots if s.cooldown_until > now]
+        if not ends or min(ends) > deadline:
+            return None
+        return min(ends) - now
+
+    async def _attempts(self, on_attempt):
+        """Gera as chaves a tentar, em ordem, até não sobrar nenhuma disponível.
+
+        Se todas as chaves restantes estiverem em cooldown, espera a primeira
+        voltar (até GEMINI_MAX_WAIT_SECONDS desde o início) e a tenta de novo,
+        mesmo que já tenha sido tentada: um 429 curto em todas as chaves vira
+        uma espera, não um relatório sem IA. Chaves rejeitadas pela validação
+        não entram em cooldown e não são tentadas de novo.
+        """
+        tried = set()
+        attempts = 0
+        deadline = time.time() + GEMINI_MAX_WAIT_SECONDS
+        while True:
+            slot = self._pick(tried)
+            if slot is None:
+                wait = self._next_release(deadline)
+                if wait is None:
+                    return
+                log.warning(
+                    f"      {Colors.WARNING}⏳ Todas as chaves do Gemini em cooldown; "
+                    f"aguardando {wait:.0f}s...{Colors.ENDC}"
+                )
+                # As chaves em cooldown voltam a valer quando ele acabar
+                now = time.time()
+                tried -= {s.index for s in self.slots if s.cooldown_until > now}
+                await asyncio.sleep(wait)
+                continue
+            if attempts:
+                record_retry("gemini")
+            attempts += 1
+            tried.add(slot.index)
+            if on_attempt:
+                on_attempt(slot.index)
+            yield slot
+
+    def _rotate(self, slot, error, started=False):
+        """Registra a falha da chave; True se a próxima chave deve ser tentada.
+
+        Só erros do próprio pedido (400, modelo inexistente) são propagados
+        direto; cota, chave inválida e falhas transitórias (5xx, timeout,
+        rede) passam para a próxima chave. Depois do primeiro pedaço de uma
+        resposta em streaming (`started`) não há rotação: o erro é propagado.
+        """
+        if not started and _is_quota_error(error):
+            self._record(slot, "throttled", cooldown=_retry_delay(error))
+            return True
+        if not started and _is_auth_error(error):
+            self._record(slot, "errors", cooldown=_AUTH_COOLDOWN_SECONDS)
+            return True
+        if not started and not _is_request_error(error):
+            self._record(slot, "errors", cooldown=_TRANSIENT_COOLDOWN_SECONDS)
+            return True
+        self._record(slot, "errors")
+        return False
+
+    @staticmethod
+    def _lookup(prompt, model, temperature, cache_ttl):
+        """(cache, chave, resposta salva ou None); cache None quando desligado."""
+        if cache_ttl <= 0:
+            return None, None, None
+        cache = get_llm_cache()
+        key = cache.make_key(model, temperature, prompt)
+        return cache, key, cache.get(key, cache_ttl)
+
+    def _accept(self, slot, content, validate, cache, key, model, temperature):
+        """Valida a resposta de uma chave e guarda no cache se aprovada."""
+        if validate and not validate(content):
+            self._record(slot, "errors")
+            return False
+        self._record(slot, "ok")
+        if cache is not None and content:
+            cache.store(key, model, temperature, content)
+        return True
+
+    @staticmethod
+    def _usage(slot, prompt, content, usage, level=logging.INFO):
+        """Registra os tokens da chamada (estimados se a API não informar)."""
+        usage = usage or {}
+        approx = "" if usage.get("input_tokens") else "~"
+        prompt_tokens = usage.get("input_tokens") or estimate_tokens(prompt)
+        completion_tokens = usage.get("output_tokens") or estimate_tokens(content)
+        record_tokens("gemini", prompt_tokens, completion_tokens)
+        log.log(
+            level,
+            f"      ↳ Tokens: {approx}{prompt_tokens} de prompt + {approx}{completion_tokens} "
+            f"de resposta (chave #{slot.index})",
+        )
+
+    def invoke(self, prompt, **kwargs):
+        """Versão síncrona de `ainvoke` (roda no loop de fundo do processo)."""
+        return run_sync(self.ainvoke(prompt, **kwargs))
+
+    async def ainvoke(
+        self,
+        prompt,
+        temperature=0.1,
+        model=GEMINI_MODEL,
+        validate=None,
+        on_attempt=None,
+        cache_ttl=LLM_CACHE_TTL_SECONDS,
+    ):
+        """Envia o prompt rotacionando as chaves e retorna o texto da resposta.
+
+        Respostas são reaproveitadas do cache em disco por `cache_ttl`
+        segundos (0 desliga); só entram no cache as que passam em `validate`.
+
+        - 429/RESOURCE_EXHAUSTED: a chave entra em cooldown e a próxima é tentada.
+        - Chave inválida: sai da rotação por uma hora e a próxima é tentada.
+        - 5xx, timeout ou erro de rede: a chave descansa alguns segundos e a
+          próxima é tentada.
+        - Todas as chaves em cooldown: espera a primeira voltar (até
+          GEMINI_MAX_WAIT_SECONDS) e tenta de novo.
+        - `validate(texto)` falso: tenta a próxima chave (ex: curadoria incompleta).
+        - Erros do próprio pedido (400/INVALID_ARGUMENT, modelo inexistente)
+          são propagados.
+
+        `on_attempt(índice_da_chave)` é chamado antes de cada tentativa.
+        """
+        cache, key, cached = self._lookup(prompt, model, temperature, cache_ttl)
+        if cached is not None and (validate is None or validate(cached)):
+            record_cache_hit("gemini")
+            return cached
+
+        last_error = None
+        async for slot in self._attempts(on_attempt):
+            await slot.bucket.aacquire()
+            try:
+                async with abackend_slot("gemini"):
+                    with timed_call("gemini") as call:
+                        client = self._client(slot, model, temperature)
+                        res = await client.ainvoke(_messages(prompt))
+                        call.bytes = len(prompt.encode("utf-8")) + len(res.text.encode("utf-8"))
+            except Exception as e:
+                last_error = e
+                if self._rotate(slot, e):
+                    continue
+                raise
+
+            content = res.text.strip()
+            self._usage(slot, prompt, content, getattr(res, "usage_metadata", None))
+            if self._accept(slot, content, validate, cache, key, model, temperature):
+                return content
+            last_error = LLMUnavailable(f"Resposta rejeitada pela validação (chave #{slot.index})")
+
+        raise LLMUnavailable(str(last_error) if last_error else "Todas as chaves em cooldown")
+
+    async def astream(
+        self,
+        prompt,
+        temperature=0.1,
+        model=GEMINI_MODEL,
+        on_attempt=None,
+        cache_ttl=LLM_CACHE_TTL_SECONDS,
+    ):
+        """Como `ainvoke`, mas gera o texto em pedaços conforme o modelo responde.
+
+        A rotação de chaves só acontece antes do primeiro pedaço; um erro no
+        meio da resposta é propagado. Respostas do cache saem em um pedaço só.
+        """
+        cache, key, cached = self._lookup(prompt, model, temperature, cache_ttl)
+        if cached is not None:
+            record_cache_hit("gemini")
+            yield cached
+            return
+
+        last_error = None
+        async for slot in self._attempts(on_attempt):
+            await slot.bucket.aacquire()
+            parts, usage = [], None
+            try:
+                async with abackend_slot("gemini"):
+                    with timed_call("gemini") as call:
+                        call.bytes = len(prompt.encode("utf-8"))
+                        client = self._client(slot, model, temperature)
+                        async for chunk in client.astream(_messages(prompt)):
+                            usage = _add_usage(usage, getattr(chunk, "usage_metadata", None))
+                            if chunk.text:
+                                parts.append(chunk.text)
+                                call.bytes += len(chunk.text.encode("utf-8"))
+                                yield chunk.text
+            except Exception as e:
+                last_error = e
+                if self._rotate(slot, e, started=bool(parts)):
+                    continue
+                raise
+
+            content = "".join(parts).strip()
+            # O relatório está sendo impresso em streaming: a linha só aparece em DEBUG
+            self._usage(slot, prompt, content, usage, level=logging.DEBUG)
+            self._accept(slot, content, None, cache, key, model, temperature)
+            return
+
+        raise LLMUnavailable(str(last_error) if last_error else "Todas as chaves em cooldown")
+
+    def stats(self):
+        """Contadores de uso por chave (identificadas só pelo índice)."""
+        with self._lock:
+            now = time.time()
+            return [
+                {
+                    "key": f"#{s.index}",
+                    **s.usage,
+                    "cooldown_seconds": round(max(0.0, s.cooldown_until - now), 1),
+                }
+                for s in self.slots
+            ]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_llm_pool():
+    """Pool único do processo, criado a partir de GEMINI_API_KEY."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = LLMPool.from_env()
+        return _pool
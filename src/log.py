@@ -0,0 +1,120 @@
+"""Log de progresso dos nós e silenciamento das bibliotecas ruidosas.
+
+Substitui os `print` dos nós e o `suppress_stdout_stderr` espalhado pelas
+chamadas: cada linha é um registro do logger "olimpia" (emitido inteiro, sob
+o lock do handler, mesmo com nós em threads ou tarefas paralelas) e o ruído
+do yfinance/DDGS/httpx é cortado uma vez pelo nível dos loggers delas.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import re
+import sys
+import time
+
+from .config import LOG_FORMAT, LOG_LEVEL
+from .metrics import current_stage
+
+# Nível mínimo de cada biblioteca (abaixo disso nada chega ao terminal)
+NOISY_LOGGERS = {
+    "yfinance": logging.CRITICAL,
+    "peewee": logging.CRITICAL,
+    "ddgs": logging.CRITICAL,
+    "duckduckgo_search": logging.CRITICAL,
+    "primp": logging.CRITICAL,
+    "httpx": logging.WARNING,
+    "httpcore": logging.WARNING,
+    "googleapiclient.discovery_cache": logging.ERROR,
+}
+
+_ANSI_RE = re.compile(r"\033\[[0-9;]*m")
+
+# Relatório ao qual as linhas pertencem (prefixo quando há vários em paralelo)
+_report = contextvars.ContextVar("olimpia_log_report", default=None)
+
+
+def quiet_libraries():
+    for name, level in NOISY_LOGGERS.items():
+        logging.getLogger(name).setLevel(level)
+
+
+@contextlib.contextmanager
+def report_context(label):
+    """Marca as linhas de log do contexto atual com o nome do relatório."""
+    token = _report.set(label)
+    try:
+        yield
+    finally:
+        _report.reset(token)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Escreve no `sys.stdout` do momento (respeita `redirect_stdout`)."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _ProgressFormatter(logging.Formatter):
+    """Mensagem como está (com cores); com `[relatório]` quando definido."""
+
+    def format(self, record):
+        message = record.getMessage()
+        label = getattr(record, "report", None)
+        if not label:
+            return message
+        # Quebras de linha iniciais ficam antes do prefixo
+        body = message.lstrip("\n")
+        return "\n" * (len(message) - len(body)) + f"[{label}] {body}"
+
+
+class _JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro (servidor e coleta de logs)."""
+
+    def format(self, record):
+        return json.dumps(
+            {
+                "ts": round(record.created, 3),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)),
+                "level": record.levelname,
+                "report": getattr(record, "report", None),
+                "stage": getattr(record, "stage", None),
+                "thread": record.threadName,
+                "message": _ANSI_RE.sub("", record.getMessage()).strip(),
+            },
+            ensure_ascii=False,
+        )
+
+
+class _ContextFilter(logging.Filter):
+    """Anexa o relatório e a etapa do contexto atual (thread ou tarefa)."""
+
+    def filter(self, record):
+        record.report = _report.get()
+        record.stage = current_stage()
+        return True
+
+
+def _build_logger():
+    logger = logging.getLogger("olimpia")
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+    handler = _StdoutHandler()
+    handler.setFormatter(_JsonFormatter() if LOG_FORMAT == "json" else _ProgressFormatter())
+    handler.addFilter(_ContextFilter())
+    logger.addHandler(handler)
+    return logger
+
+
+quiet_libraries()
+log = _build_logger()
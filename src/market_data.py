@@ -0,0 +1,392 @@
+import datetime
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from .cache import MISSING, TTLCache, get_market_cache
+from .config import (
+    BULK_WINDOW_SECONDS,
+    HISTORY_TTL_SECONDS,
+    INFO_TTL_SECONDS,
+    QUOTE_TTL_SECONDS,
+    VALIDATION_NEGATIVE_TTL_SECONDS,
+    VALIDATION_TTL_SECONDS,
+)
+from .metrics import active_runs, record_cache_hit, record_error, timed_call
+from .utils import backend_slot
+
+# yfinance só é importado na primeira ida à rede (cache quente não precisa)
+yf = None
+
+
+def _yfinance():
+    global yf
+    if yf is None:
+        import yfinance
+
+        yf = yfinance
+    return yf
+
+
+class MarketDataUnavailable(Exception):
+    """O yfinance não respondeu (rede/HTTP): não é prova de que o ticker não existe."""
+
+
+# Erros do yfinance que significam "sem cotação" (resposta definitiva)
+_NO_DATA_RE = re.compile(
+    r"delisted|no (?:price )?data|no timezone|PricesMissing|TzMissing", re.IGNORECASE
+)
+
+
+def _download_errors():
+    """Erros por ticker registrados pelo último yf.download (`yfinance.shared._ERRORS`)."""
+    shared = getattr(_yfinance(), "shared", None)
+    return dict(getattr(shared, "_ERRORS", None) or {})
+
+
+# Colunas mantidas por ticker (Close nominal + Adj Close vêm do mesmo download)
+HISTORY_COLUMNS = [
+    "Open", "High", "Low", "Close", "Adj Close", "Volume", "Dividends", "Stock Splits"
+]
+
+
+def _split_download(data, tickers):
+    """Separa o DataFrame multi-ticker do yf.download em um DataFrame por ticker."""
+    histories = {}
+    if data is None or data.empty:
+        return {t: pd.DataFrame(columns=HISTORY_COLUMNS) for t in tickers}
+
+    if not isinstance(data.columns, pd.MultiIndex):
+        data = pd.concat({tickers[0]: data}, axis=1).swaplevel(axis=1)
+
+    if data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+
+    available = set(data.columns.get_level_values(1))
+    for ticker in tickers:
+        if ticker not in available:
+            histories[ticker] = pd.DataFrame(columns=HISTORY_COLUMNS)
+            continue
+        hist = data.xs(ticker, axis=1, level=1).reindex(columns=HISTORY_COLUMNS)
+        hist[["Dividends", "Stock Splits"]] = hist[["Dividends", "Stock Splits"]].fillna(0.0)
+        histories[ticker] = hist.dropna(subset=["Close"])
+    return histories
+
+
+def download_history(tickers, period="1y", start=None):
+    """Baixa o OHLCV de N tickers em UMA chamada ao yf.download.
+
+    Retorna um dict ticker -> DataFrame com Close nominal, Adj Close (retorno
+    total) e Dividends, evitando os dois `history()` + `.dividends` por ativo.
+    Tickers cujo pedido falhou (rede/HTTP) ficam fora do dict; se todos
+    falharem, levanta MarketDataUnavailable.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+
+    kwargs = {"start": start} if start is not None else {"period": period}
+    with backend_slot("yfinance"), timed_call("yfinance") as call:
+        data = _yfinance().download(
+            tickers,
+            auto_adjust=False,
+            actions=True,
+            group_by="column",
+            progress=False,
+            threads=True,
+            **kwargs,
+        )
+        # Lido dentro do slot: o yf.download seguinte zera o registro
+        errors = _download_errors()
+        # Tamanho do DataFrame recebido (aproxima o volume baixado)
+        call.bytes = int(data.memory_usage(deep=False).sum())
+
+    failed = {t: e for t, e in errors.items() if t in tickers and not _NO_DATA_RE.search(str(e))}
+    if failed and len(failed) == len(tickers):
+        raise MarketDataUnavailable(f"yf.download falhou: {next(iter(failed.values()))}")
+    for ticker, error in failed.items():
+        record_error("download_history", MarketDataUnavailable(f"{ticker}: {error}"))
+    histories = _split_download(data, tickers)
+    return {t: h for t, h in histories.items() if t not in failed}
+
+
+def _wide(histories, column):
+    """Monta um DataFrame (datas x tickers) para uma coluna do histórico."""
+    return pd.concat(
+        {t: h[column] for t, h in histories.items() if not h.empty}, axis=1
+    ).sort_index()
+
+
+def compute_metrics(histories, now=None):
+    """Calcula as métricas do dashboard para todos os tickers de uma vez.
+
+    Retorna um DataFrame indexado por ticker com as colunas `price`, `low52`,
+    `high52`, `chg52` (retorno total 12m) e `div_yield` (fração, ex: 0.08).
+    """
+    tickers = list(histories)
+    result = pd.DataFrame(
+        index=pd.Index(tickers, name="ticker"),
+        columns=["price", "low52", "high52", "chg52", "div_yield", "dividends_12m"],
+        dtype=float,
+    )
+    if not any(not h.empty for h in histories.values()):
+        return result
+
+    now = now or datetime.datetime.now()
+    cutoff = pd.Timestamp(now - datetime.timedelta(days=365))
+
+    close = _wide(histories, "Close")
+    adj = _wide(histories, "Adj Close")
+    low = _wide(histories, "Low")
+    high = _wide(histories, "High")
+    dividends = _wide(histories, "Dividends").fillna(0.0)
+
+    # Preço Atual (Nominal): último fechamento válido de cada coluna
+    price = close.ffill().iloc[-1]
+
+    # MÍNIMA/MÁXIMA (Nominal - Preço de Tela), ignorando barras corrompidas
+    valid_rows = low > 0.01
+    low52 = low.where(valid_rows).min().fillna(low.min())
+    high52 = high.where(valid_rows).max().fillna(high.max())
+
+    # VARIAÇÃO 12M (Ajustado - Retorno Total)
+    adj = adj.where(adj > 0)
+    start_adj = adj.bfill().iloc[0]
+    end_adj = adj.ffill().iloc[-1]
+    chg52 = (end_adj / start_adj - 1).fillna(0.0)
+
+    # Dividend Yield: soma dos proventos dos últimos 12 meses / preço atual
+    dividends_12m = dividends[dividends.index >= cutoff].sum()
+    div_yield = (dividends_12m / price.replace(0, np.nan)).fillna(0.0)
+
+    computed = pd.DataFrame(
+        {
+            "price": price,
+            "low52": low52,
+            "high52": high52,
+            "chg52": chg52,
+            "div_yield": div_yield,
+            "dividends_12m": dividends_12m,
+        }
+    )
+    result.update(computed)
+    return result
+
+
+def last_bar_dates(histories):
+    """Data do último pregão guardado de cada ticker (None sem histórico)."""
+    return {t: (h.index[-1] if not h.empty else None) for t, h in histories.items()}
+
+
+def info_metrics(info):
+    """Métricas do dashboard a partir do `.info` (fallback sem histórico).
+
+    Mesmas chaves e unidades de `compute_metrics`: o DY sai sempre como
+    fração. Prefere o provento dos últimos 12 meses dividido pelo preço; o
+    `dividendYield` do yfinance vem em porcentagem (ex: 11.45).
+    """
+    price = info.get("currentPrice") or info.get("regularMarketPrice")
+    rate = info.get("trailingAnnualDividendRate")
+    if rate is not None and price:
+        div_yield = rate / price
+    elif info.get("trailingAnnualDividendYield") is not None:
+        div_yield = info["trailingAnnualDividendYield"]
+    elif info.get("dividendYield") is not None:
+        div_yield = info["dividendYield"] / 100
+    else:
+        div_yield = None
+    return {
+        "price": price,
+        "low52": info.get("fiftyTwoWeekLow"),
+        "high52": info.get("fiftyTwoWeekHigh"),
+        "chg52": info.get("52WeekChange"),
+        "div_yield": div_yield,
+        "dividends_12m": rate,
+    }
+
+
+def load_histories(tickers):
+    """Histórico de 1 ano de N tickers passando pelo cache em disco.
+
+    - Cache mais novo que QUOTE_TTL: nenhuma chamada de rede.
+    - Mais velho: baixa só as barras a partir da última data guardada.
+    - Sem cache, mais velho que HISTORY_TTL ou com provento/desdobramento novo
+      (o Adj Close muda para trás): baixa o ano inteiro de novo.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    cache = get_market_cache()
+    now = time.time()
+
+    full, incremental = [], {}
+    for ticker in tickers:
+        status = cache.history_status(ticker)
+        if status is None or status[2] is None or now - status[1] >= HISTORY_TTL_SECONDS:
+            full.append(ticker)
+        elif now - status[0] >= QUOTE_TTL_SECONDS:
+            incremental[ticker] = pd.Timestamp(status[2])
+    record_cache_hit("yfinance", len(tickers) - len(full) - len(incremental))
+
+    if incremental:
+        # Refaz a última barra guardada (pode ser um pregão ainda em andamento)
+        fetched = download_history(list(incremental), start=min(incremental.values()))
+        for ticker, hist in fetched.items():
+            last_date = incremental[ticker]
+            hist = hist[hist.index >= last_date]
+            new_bars = hist[hist.index > last_date]
+            if (new_bars[["Dividends", "Stock Splits"]] > 0).any().any():
+                full.append(ticker)
+            elif not hist.empty:
+                cache.store_history(ticker, hist, full=False)
+
+    if full:
+        for ticker, hist in download_history(full).items():
+            if not hist.empty:
+                cache.store_history(ticker, hist, full=True)
+
+    since = pd.Timestamp(datetime.datetime.now() - datetime.timedelta(days=365))
+    return {t: cache.load_history(t, since=since) for t in tickers}
+
+
+def get_quote(ticker):
+    """Último preço (fast_info) com TTL curto de cotação intradiária."""
+    cache = get_market_cache()
+    price = cache.get_quote(ticker, QUOTE_TTL_SECONDS)
+    if price is not None:
+        record_cache_hit("yfinance")
+        return price
+    try:
+        with backend_slot("yfinance"), timed_call("yfinance"):
+            price = _yfinance().Ticker(ticker).fast_info.last_price
+    except Exception as e:
+        record_error("get_quote", e)
+        return None
+    if price:
+        cache.store_quote(ticker, float(price))
+    return price
+
+
+def get_info(ticker):
+    """Campos do `.info` do yfinance, guardados por INFO_TTL."""
+    cache = get_market_cache()
+    info = cache.get_info(ticker, INFO_TTL_SECONDS)
+    if info is not None:
+        record_cache_hit("yfinance")
+        return info
+    with backend_slot("yfinance"), timed_call("yfinance") as call:
+        info = _yfinance().Ticker(ticker).info or {}
+        call.bytes = len(json.dumps(info, default=str).encode("utf-8"))
+    cache.store_info(ticker, info)
+    return info
+
+
+def ticker_exists(ticker):
+    """Verifica se o ticker tem cotação, usando o cache sempre que possível.
+
+    Levanta MarketDataUnavailable quando o yfinance não respondeu: só um
+    download sem erro de rede e sem barras prova que o ticker não existe.
+    """
+    status = get_market_cache().history_status(ticker)
+    if status and status[2] and time.time() - status[0] < HISTORY_TTL_SECONDS:
+        return True
+    if get_quote(ticker):
+        return True
+    return not load_histories([ticker])[ticker].empty
+
+
+# Compartilhado entre threads (batch) e entre estratégias do TickerFinder
+_validation_cache = TTLCache(VALIDATION_TTL_SECONDS, VALIDATION_NEGATIVE_TTL_SECONDS)
+_validation_counts = {"disk_hits": 0, "network_checks": 0}
+_validation_lock = threading.Lock()
+
+
+def validate_ticker(ticker):
+    """`ticker_exists` memoizado em memória e em disco, inclusive negativos."""
+    valid = _validation_cache.get(ticker)
+    if valid is not MISSING:
+        return valid
+
+    cache = get_market_cache()
+    valid = cache.get_validation(ticker, VALIDATION_TTL_SECONDS, VALIDATION_NEGATIVE_TTL_SECONDS)
+    if valid is None:
+        try:
+            valid = ticker_exists(ticker)
+        except Exception as e:
+            # Erro de rede não é prova de que o ticker não existe: não vai
+            # para o cache (nem em memória nem em disco)
+            record_error("validate_ticker", e)
+            return False
+        cache.store_validation(ticker, valid)
+        counter = "network_checks"
+    else:
+        counter = "disk_hits"
+
+    with _validation_lock:
+        _validation_counts[counter] += 1
+    _validation_cache.set(ticker, valid)
+    return valid
+
+
+def validation_stats():
+    """Contadores do cache de validação (memória, disco e rede)."""
+    stats = _validation_cache.stats()
+    with _validation_lock:
+        stats.update(_validation_counts)
+    return stats
+
+
+class _BulkLoader:
+    """Agrupa pedidos simultâneos de histórico em um único yf.download.
+
+    No modo batch vários MarketAnalysts rodam em paralelo; o primeiro pedido
+    espera uma pequena janela, coleta os tickers que chegaram nesse meio tempo
+    e carrega todos juntos (cache + um download para os que faltarem). Com um
+    único relatório em andamento (ex: CLI) não há com quem agrupar e o pedido
+    é carregado na hora.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def get(self, ticker):
+        with self._lock:
+            future = self._pending.get(ticker)
+            leader = not self._pending
+            if future is None:
+                future = Future()
+                self._pending[ticker] = future
+
+        if leader:
+            if active_runs() > 1:
+                time.sleep(self.window)
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            try:
+                loaded = load_histories(list(batch))
+                for t, f in batch.items():
+                    f.set_result(loaded.get(t))
+            except Exception as e:
+                for f in batch.values():
+                    f.set_exception(e)
+
+        return future.result()
+
+
+_loader = _BulkLoader(BULK_WINDOW_SECONDS)
+
+
+def prefetch(tickers):
+    """Pré-carrega o histórico de vários tickers em uma única chamada."""
+    return load_histories(tickers)
+
+
+def get_history(ticker):
+    """Histórico de 1 ano de um ticker (agrupado com pedidos concorrentes)."""
+    hist = _loader.get(ticker)
+    return hist if hist is not None else pd.DataFrame(columns=HISTORY_COLUMNS)
@@ -0,0 +1,327 @@
+import contextlib
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+
+from .config import PROFILE_DIR, Colors
+
+# Execução atual (um relatório) e nó do grafo em andamento. Os valores são
+# copiados para as threads/tarefas filhas, então as chamadas externas feitas
+# pelos pools de busca e pelo asyncio são atribuídas à execução certa.
+_current_run = contextvars.ContextVar("olimpia_run", default=None)
+_current_stage = contextvars.ContextVar("olimpia_stage", default=None)
+
+# Relatórios em andamento no processo (batch/servidor rodam vários juntos)
+_active_runs = 0
+_active_lock = threading.Lock()
+
+
+def _new_counter():
+    return {
+        "calls": 0,
+        "seconds": 0.0,
+        "bytes": 0,
+        "cache_hits": 0,
+        "errors": 0,
+        "retries": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+    }
+
+
+class RunMetrics:
+    """Tempos por nó e contadores por backend externo de um relatório."""
+
+    def __init__(self, label):
+        self.label = label
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.seconds = 0.0
+        self.stages = {}
+        self.backends = {}
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def _counter(self, backend):
+        return self.backends.setdefault(backend, {**_new_counter(), "by_stage": {}})
+
+    def add_stage(self, name, seconds, skipped=False):
+        with self._lock:
+            self.stages[name] = {"seconds": round(seconds, 4), "skipped": skipped}
+
+    def add_call(self, backend, seconds, nbytes=0, error=False):
+        stage = _current_stage.get() or "-"
+        with self._lock:
+            counter = self._counter(backend)
+            counter["calls"] += 1
+            counter["seconds"] += seconds
+            counter["bytes"] += nbytes
+            counter["errors"] += int(error)
+            counter["by_stage"][stage] = counter["by_stage"].get(stage, 0.0) + seconds
+
+    def add(self, backend, field, n=1):
+        with self._lock:
+            self._counter(backend)[field] += n
+
+    def add_error(self, where, error):
+        with self._lock:
+            self.errors.append(
+                {
+                    "where": where,
+                    "stage": _current_stage.get(),
+                    "type": type(error).__name__,
+                    "message": str(error)[:300],
+                }
+            )
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+
+    def to_dict(self):
+        with self._lock:
+            backends = {
+                name: {
+                    **{k: v for k, v in c.items() if k != "by_stage"},
+                    "seconds": round(c["seconds"], 4),
+                    "by_stage": {s: round(v, 4) for s, v in c["by_stage"].items()},
+                }
+                for name, c in self.backends.items()
+            }
+            return {
+                "label": self.label,
+                "started_at": self.started_at,
+                "seconds": round(self.seconds, 4),
+                "stages": dict(self.stages),
+                "backends": backends,
+                "errors": list(self.errors),
+            }
+
+
+@contextlib.contextmanager
+def track_run(label):
+    """Abre a coleta de métricas de um relatório no contexto atual."""
+    global _active_runs
+    run = RunMetrics(label)
+    token = _current_run.set(run)
+    with _active_lock:
+        _active_runs += 1
+    try:
+        yield run
+    finally:
+        with _active_lock:
+            _active_runs -= 1
+        run.finish()
+        _current_run.reset(token)
+
+
+def current_run():
+    return _current_run.get()
+
+
+def active_runs():
+    """Quantos relatórios estão em andamento no processo."""
+    return _active_runs
+
+
+def current_stage():
+    return _current_stage.get()
+
+
+class _Call:
+    """Chamada externa em andamento (`bytes` pode ser preenchido pelo chamador)."""
+
+    __slots__ = ("bytes",)
+
+    def __init__(self):
+        self.bytes = 0
+
+
+@contextlib.contextmanager
+def timed_call(backend):
+    """Mede uma chamada externa (DDG, Google, HTTP, yfinance, Gemini)."""
+    call = _Call()
+    run = _current_run.get()
+    if run is None:
+        yield call
+        return
+    start = time.perf_counter()
+    error = False
+    try:
+        yield call
+    except Exception:
+        error = True
+        raise
+    finally:
+        run.add_call(backend, time.perf_counter() - start, call.bytes, error)
+
+
+def record_cache_hit(backend, n=1):
+    run = _current_run.get()
+    if run is not None and n:
+        run.add(backend, "cache_hits", n)
+
+
+def record_retry(backend):
+    run = _current_run.get()
+    if run is not None:
+        run.add(backend, "retries")
+
+
+def record_tokens(backend, prompt_tokens, completion_tokens):
+    """Tokens de prompt e de resposta de uma chamada ao LLM."""
+    run = _current_run.get()
+    if run is not None:
+        run.add(backend, "prompt_tokens", prompt_tokens)
+        run.add(backend, "completion_tokens", completion_tokens)
+
+
+def record_error(where, error):
+    """Registra uma exceção tratada (antes eram engolidas por `except: pass`)."""
+    run = _current_run.get()
+    if run is not None:
+        run.add_error(where, error)
+
+
+@contextlib.contextmanager
+def _stage(name):
+    """Marca o estágio atual e registra o tempo dele (`result["update"]`)."""
+    token = _current_stage.set(name)
+    start = time.perf_counter()
+    result = {"update": None}
+    try:
+        yield result
+    finally:
+        metrics = _current_run.get()
+        if metrics is not None:
+            metrics.add_stage(name, time.perf_counter() - start, skipped=result["update"] == {})
+        _current_stage.reset(token)
+
+
+def timed_node(name, func):
+    """Envolve um nó do grafo para medir o tempo e marcar o estágio atual."""
+
+    def run(state, config):
+        with _stage(name) as result:
+            result["update"] = func(state, config)
+            return result["update"]
+
+    run.__name__ = func.__name__
+    return run
+
+
+def atimed_node(name, afunc):
+    """Versão de `timed_node` para nós assíncronos."""
+
+    async def arun(state, config):
+        with _stage(name) as result:
+            result["update"] = await afunc(state, config)
+            return result["update"]
+
+    arun.__name__ = afunc.__name__
+    return arun
+
+
+def write_profile(profile, directory=PROFILE_DIR):
+    """Grava o perfil de uma execução em JSON e retorna o caminho."""
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", profile["label"]).strip("_").upper() or "RUN"
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(profile["started_at"]))
+    path = os.path.join(directory, f"{slug}_{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def percentile(values, p):
+    """Percentil com interpolação linear (p entre 0 e 100)."""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    pos = (len(values) - 1) * p / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def aggregate_profiles(profiles):
+    """p50/p95 por estágio e por backend a partir dos perfis de um batch."""
+    stages, backends = {}, {}
+    for profile in profiles:
+        stages.setdefault("total", []).append(profile["seconds"])
+        for name, stage in profile["stages"].items():
+            stages.setdefault(name, []).append(stage["seconds"])
+        for name, counter in profile["backends"].items():
+            backends.setdefault(name, []).append(counter)
+
+    def summary(values):
+        return {
+            "count": len(values),
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "max": round(max(values), 3),
+        }
+
+    return {
+        "stages": {name: summary(values) for name, values in stages.items()},
+        "backends": {
+            name: {
+                **summary([c["seconds"] for c in counters]),
+                **{
+                    field: sum(c.get(field, 0) for c in counters)
+                    for field in (
+                        "calls",
+                        "bytes",
+                        "cache_hits",
+                        "errors",
+                        "retries",
+                        "prompt_tokens",
+                        "completion_tokens",
+                    )
+                },
+            }
+            for name, counters in backends.items()
+        },
+    }
+
+
+def print_profile(profile):
+    """Tabela de fim de execução: tempo por nó e por backend externo."""
+    print(f"\n{Colors.BOLD}{'ETAPA':<16} {'TEMPO':>9}{Colors.ENDC}")
+    for name, stage in profile["stages"].items():
+        note = " (checkpoint)" if stage["skipped"] else ""
+        print(f"{name:<16} {stage['seconds']:>8.2f}s{note}")
+    print(f"{'TOTAL':<16} {profile['seconds']:>8.2f}s")
+
+    if profile["backends"]:
+        print(
+            f"\n{Colors.BOLD}{'BACKEND':<12} {'CHAMADAS':>8} {'TEMPO':>9} {'KB':>8} "
+            f"{'CACHE':>6} {'RETRY':>6} {'ERROS':>6}{Colors.ENDC}"
+        )
+        for name, c in sorted(profile["backends"].items(), key=lambda kv: -kv[1]["seconds"]):
+            print(
+                f"{name:<12} {c['calls']:>8} {c['seconds']:>8.2f}s {c['bytes'] / 1024:>8.1f} "
+                f"{c['cache_hits']:>6} {c['retries']:>6} {c['errors']:>6}"
+            )
+        for name, c in profile["backends"].items():
+            if c.get("prompt_tokens") or c.get("completion_tokens"):
+                print(
+                    f"{name:<12} tokens: {c['prompt_tokens']} de prompt, "
+                    f"{c['completion_tokens']} de resposta"
+                )
+    for e in profile["errors"]:
+        print(f"   {Colors.FAIL}✗ [{e['stage'] or '-'}] {e['where']}: {e['type']}: {e['message'][:80]}{Colors.ENDC}")
+
+
+def print_stage_percentiles(aggregate):
+    """Tabela p50/p95 por etapa do batch."""
+    print(f"\n{Colors.BOLD}{'ETAPA':<16} {'P50':>8} {'P95':>8} {'MAX':>8}{Colors.ENDC}")
+    for name, s in aggregate["stages"].items():
+        print(f"{name:<16} {s['p50']:>7.2f}s {s['p95']:>7.2f}s {s['max']:>7.2f}s")
+    for name, b in sorted(aggregate["backends"].items(), key=lambda kv: -kv[1]["p95"]):
+        print(
+            f"{name:<16} {b['p50']:>7.2f}s {b['p95']:>7.2f}s {b['max']:>7.2f}s "
+            f"({b['calls']} chamadas, {b['cache_hits']} do cache, {b['retries']} retries)"
+        )
@@ -1,23 +1,42 @@
+import asyncio
 import os
-import time
 
-from langchain_core.messages import HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langgraph.config import get_stream_writer
 
+from ..background import sync_node
 from ..config import Colors
+from ..log import log
+from ..llm import get_llm_pool
+from ..metrics import record_error
+from ..prompts import PromptBuilder, compact_dashboard, fit_news, render_news
 from ..state import ResearchState
 
 
-def node_editor(state: ResearchState):
-    # Cor AMARELA para o Editor
-    print(f"{Colors.WARNING}✍️  [Editor]{Colors.ENDC} Gerando relatório...")
+def _stream_writer():
+    """Writer do modo de streaming "custom" do LangGraph (no-op fora do grafo)."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
 
-    def make_fallback(reason="Template Automático"):
-        return f"""# 🏛️ Equity Research: {state["company_name"].upper()}
+def _header(state):
+    # Título, dashboard e comparação setorial não dependem do modelo: saem imediatamente
+    header = f"""# 🏛️ Equity Research: {state["company_name"].upper()}
 
 {state["stock_data"]}
 
-## 🏢 Perfil Corporativo
+"""
+    if state.get("peer_data"):
+        header += f"""## 📊 Comparação Setorial
+{state["peer_data"]}
+
+"""
+    return header
+
+
+def _fallback(state, reason="Template Automático"):
+    return _header(state) + f"""## 🏢 Perfil Corporativo
 {state["summary_data"]}
 
 ## 📰 Notícias Recentes
@@ -26,75 +45,99 @@ def node_editor(state: ResearchState):
 ---
 *Relatório gerado via {reason} (Dados reais coletados)*"""
 
-    # Verifica se estamos em MOCK MODE (sem chave definida)
-    if "GEMINI_API_KEY" not in os.environ:
-        time.sleep(1.5)
-        print(
-            f"   {Colors.GREEN}⚠️  Modo MOCK: Gerando relatório com dados reais.{Colors.ENDC}"
-        )
-        return {"final_report": make_fallback("Modo Mock")}
-
-    MODELO = "gemini-2.5-flash"
-
-    # Rotação de chaves
-    keys = os.environ["GEMINI_API_KEY"].split(",")
-
-    for k_idx, key in enumerate(keys):
-        key = key.strip()
-        if not key:
-            continue
-
-        print(f"   🔑 Tentando API Key #{k_idx + 1}...")
-
-        try:
-            llm = ChatGoogleGenerativeAI(
-                model=MODELO,
-                temperature=0.1,
-                google_api_key=key,
-            )
 
-            prompt = f"""
-            Analista Sênior de Investment Banking. Gere um relatório executivo sobre: {state["company_name"]} ({state["ticker"]}).
+def _prompt(state):
+    # O dashboard já sai no cabeçalho: no prompt vai só a linha compacta
+    builder = PromptBuilder("editor")
+    builder.section("DASHBOARD FINANCEIRO", compact_dashboard(state["stock_data"]))
+    items = state.get("news_items")
+    if items:
+        builder.section("NOTÍCIAS", render_news(items), fit=lambda max_tokens: fit_news(items, max_tokens))
+    else:
+        # Checkpoints antigos (sem itens estruturados)
+        builder.section("NOTÍCIAS", state["news_data"])
+    builder.section("COMPARAÇÃO SETORIAL", state.get("peer_data"))
+    builder.section("RESUMO", state["summary_data"])
+    # No modo setorial, um parágrafo situa o ativo frente aos pares
+    peers = (
+        """
+## 🏭 Posição no Setor
+(Compare o ativo com a mediana do setor em preço na faixa de 52 semanas, DY e variação em 12 meses).
+"""
+        if state.get("peer_data")
+        else ""
+    )
+    return builder.build(
+        f"""Analista Sênior de Investment Banking. Gere um relatório executivo sobre: {state["company_name"]} ({state["ticker"]}).
+
+INPUTS:
+{{sections}}
+
+OUTPUT OBRIGATÓRIO (MARKDOWN), começando direto pela seção abaixo
+(o título, o dashboard e a comparação setorial já foram impressos, não os repita):
 
-            INPUTS:
-            [DASHBOARD FINANCEIRO]:
-            {state["stock_data"]}
-
-            [RESUMO]:
-            {state["summary_data"]}
-
-            [NOTÍCIAS]:
-            {state["news_data"]}
-
-            OUTPUT OBRIGATÓRIO (MARKDOWN):
-            # 🏛️ Equity Research: {state["company_name"].upper()}
-
-            {state["stock_data"]}
-
-            ## 🏢 Perfil Corporativo
-            (Escreva um parágrafo sólido e profissional sobre o negócio da empresa, focado em investidores).
-
-            ## 📰 Notícias Recentes
-            (Liste as 3 notícias mais relevantes. Use Citação '>' para o resumo).
-
-            * **[Título da Notícia](Link)**
-              > Resumo do impacto ou fato relevante contido na notícia.
+## 🏢 Perfil Corporativo
+(Escreva um parágrafo sólido e profissional sobre o negócio da empresa, focado em investidores).
+{peers}
+## 📰 Notícias Recentes
+(Liste as 3 notícias mais relevantes. Use Citação '>' para o resumo).
 
-            ---
-            *Relatório gerado por AI (Olimpia Agent).*
-            """
+* **[Título da Notícia](Link)**
+  > Resumo do impacto ou fato relevante contido na notícia.
 
-            try:
-                res = llm.invoke([HumanMessage(content=prompt)])
-                return {"final_report": res.content}
-            except Exception as e:
-                print(f"      ❌ Erro na Key #{k_idx + 1}: {str(e)[:100]}...")
-                if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
-                    continue  # Tenta próxima chave
-                else:
-                    break  # Erro fatal
-        except:
-            pass
+---
+*Relatório gerado por AI (Olimpia Agent).*"""
+    )
+
+
+def _mock(state, emit):
+    log.info(
+        f"   {Colors.GREEN}⚠️  Modo MOCK: Gerando relatório com dados reais.{Colors.ENDC}"
+    )
+    report = _fallback(state, "Modo Mock")
+    emit({"report_chunk": report})
+    return {"final_report": report, "report_source": "mock"}
+
+
+def _failed(state, emit, header, parts, error):
+    """Relatório de fallback quando nenhuma chave conseguiu gerar o texto."""
+    record_error("geração do relatório", error)
+    log.error(f"      ❌ Erro: {str(error)[:100]}...")
+    log.error(f"{Colors.FAIL}⚠️ Todas as chaves falharam. Usando Fallback.{Colors.ENDC}")
+    report = _fallback(state, "Fallback (Todas as chaves esgotadas)")
+    if parts:
+        # A resposta parou no meio: quem está imprimindo recomeça do zero
+        emit({"report_restart": True})
+        emit({"report_chunk": report})
+    else:
+        emit({"report_chunk": report[len(header):]})
+    return {"final_report": report, "report_source": "fallback"}
+
+
+async def anode_editor(state: ResearchState):
+    """Relatório final; o texto chega por `astream` do pool de chaves."""
+    # Cor AMARELA para o Editor
+    log.info(f"{Colors.WARNING}✍️  [Editor]{Colors.ENDC} Gerando relatório...")
+    emit = _stream_writer()
 
-    print(f"{Colors.FAIL}⚠️ Todas as chaves falharam. Usando Fallback.{Colors.ENDC}")
-    return {"final_report": make_fallback("Fallback (Todas as chaves esgotadas)")}
+    # Verifica se estamos em MOCK MODE (sem chave definida)
+    if "GEMINI_API_KEY" not in os.environ:
+        await asyncio.sleep(1.5)
+        return _mock(state, emit)
+
+    # Rotação de chaves (pool compartilhado com cooldown por chave), com a
+    # resposta repassada em pedaços para quem consome o grafo em streaming
+    header = _header(state)
+    emit({"report_chunk": header})
+    parts = []
+    try:
+        async for text in get_llm_pool().astream(_prompt(state), temperature=0.1):
+            parts.append(text)
+            emit({"report_chunk": text})
+        return {"final_report": header + "".join(parts).strip(), "report_source": "ai"}
+    except Exception as e:
+        return _failed(state, emit, header, parts, e)
+
+
+# Caminho síncrono (CLI): a mesma corrotina, no loop de fundo do processo
+node_editor = sync_node(anode_editor)
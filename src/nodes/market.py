@@ -1,127 +1,155 @@
-import datetime
+import asyncio
 import math
 
-import yfinance as yf
-
+from .. import analytics
 from ..config import Colors
+from ..log import log
+from ..market_data import compute_metrics, get_history, get_info, info_metrics
+from ..metrics import record_error
 from ..state import ResearchState
-from ..utils import suppress_stdout_stderr
-
+from ..ticker_index import get_ticker_index
+
+
+def _load(ticker):
+    """Métricas do dashboard: tabela pré-calculada ou cálculo na hora."""
+    # O(1): linha da tabela atualizada após o fechamento (+ último preço)
+    metrics = analytics.lookup(ticker)
+    if metrics is not None:
+        log.info(f"   ↳ Métricas pré-calculadas (pregão de {metrics['last_bar']})")
+        return metrics
+    # Um único yf.download traz Close nominal (Min/Max de tela),
+    # Adj Close (retorno total) e os dividendos do período
+    hist = get_history(ticker)
+    if not hist.empty:
+        return compute_metrics({ticker: hist}).loc[ticker].to_dict()
+    # Fallback se não tiver histórico
+    return info_metrics(get_info(ticker))
+
+
+def _fmt(val, prefix="", suffix="", mult=1):
+    if (
+        val is None
+        or val == "-"
+        or (isinstance(val, float) and math.isnan(val))
+    ):
+        return "N/A"
+    return f"{prefix}{val * mult:.2f}{suffix}"
+
+
+def _dashboard(metrics):
+    """Dashboard ASCII com preço, faixa de 52 semanas, DY e variação em 12 meses."""
+    price = metrics["price"]
+    low52 = metrics["low52"]
+    high52 = metrics["high52"]
+    chg52 = metrics["chg52"]
+    div_yield = metrics["div_yield"]
+
+    # Filtros de sanidade
+    if div_yield and div_yield < 0:
+        div_yield = None
+    if low52 and low52 <= 0.01:
+        low52 = None
+
+    current = _fmt(price, prefix="R$ ")
+    min_52 = _fmt(low52, prefix="R$ ")
+    max_52 = _fmt(high52, prefix="R$ ")
+    # DY sempre como fração (normalizado em market_data/analytics)
+    dy = _fmt(div_yield, suffix="%", mult=100)
+    var_12m = _fmt(chg52, suffix="%", mult=100)
+
+    # Dashboard Alinhado (ASCII Art Clean)
+    return (
+        f"┌{'─' * 14}┬{'─' * 14}┬{'─' * 14}┬{'─' * 14}┬{'─' * 14}┐\n"
+        f"│ {'PREÇO ATUAL':^12} │ {'MIN 52 SEM':^12} │ {'MAX 52 SEM':^12} │ {'DIV. YIELD':^12} │ {'VAR. 12M':^12} │\n"
+        f"├{'─' * 14}┼{'─' * 14}┼{'─' * 14}┼{'─' * 14}┼{'─' * 14}┤\n"
+        f"│ {current:^12} │ {min_52:^12} │ {max_52:^12} │ {dy:^12} │ {var_12m:^12} │\n"
+        f"└{'─' * 14}┴{'─' * 14}┴{'─' * 14}┴{'─' * 14}┴{'─' * 14}┘"
+    )
+
+
+def _peer_table(ticker, frame):
+    """Tabela Markdown do setor: uma linha por ativo e a mediana do grupo."""
+    frame = frame.copy()
+    # Mesmos filtros de sanidade do dashboard
+    frame.loc[frame["div_yield"] < 0, "div_yield"] = math.nan
+    frame.loc[frame["low52"] <= 0.01, "low52"] = math.nan
+
+    def row(label, values):
+        return (
+            f"| {label} | {_fmt(values['price'], prefix='R$ ')} "
+            f"| {_fmt(values['low52'], prefix='R$ ')} | {_fmt(values['high52'], prefix='R$ ')} "
+            f"| {_fmt(values['div_yield'], suffix='%', mult=100)} "
+            f"| {_fmt(values['chg52'], suffix='%', mult=100)} |"
+        )
 
-def node_market_analyst(state: ResearchState):
+    lines = [
+        "| Ativo | Preço | Mín 52 sem | Máx 52 sem | DY | Var. 12M |",
+        "|---|---:|---:|---:|---:|---:|",
+    ]
+    for symbol, values in frame.iterrows():
+        label = symbol.replace(".SA", "")
+        lines.append(row(f"**{label}**" if symbol == ticker else label, values))
+    # Mediana só entre os ativos com cotação
+    quoted = frame.dropna(subset=["price"])
+    if len(quoted) > 1:
+        lines.append(row("*Mediana do setor*", quoted.median()))
+    return "\n".join(lines)
+
+
+def _peers(ticker, metrics):
+    """Métricas do setor em uma passada; a linha do ativo usa as mesmas do dashboard."""
+    group = get_ticker_index().peers(ticker)
+    if len(group) < 2:
+        log.warning(f"   ↳ {Colors.WARNING}Setor sem outras empresas no índice.{Colors.ENDC}")
+        return ""
+    frame = analytics.group_metrics(group)
+    for name in analytics.COLUMNS:
+        if name in metrics:
+            frame.loc[ticker, name] = metrics[name]
+    log.info(f"   ↳ {Colors.GREEN}Comparação setorial:{Colors.ENDC} {len(group)} ativos")
+    return _peer_table(ticker, frame)
+
+
+def _start(state):
     ticker = state["ticker"]
     # Cor MAGENTA para Mercado
-    print(f"{Colors.HEADER}📊 [Market Analyst]{Colors.ENDC} Cotando ativo: {ticker}...")
+    log.info(f"{Colors.HEADER}📊 [Market Analyst]{Colors.ENDC} Cotando ativo: {ticker}...")
+    return ticker
 
-    stock_data_str = "Dados Indisponíveis"
-    with suppress_stdout_stderr():
-        try:
-            stock = yf.Ticker(ticker)
-
-            # Coleta dados históricos HÍBRIDOS (Nominal e Ajustado)
-            # 1. Nominal: Para Min/Max de tela (sem descontar dividendos)
-            hist_nominal = stock.history(period="1y", auto_adjust=False)
-            # 2. Ajustado: Para cálculo de Rentabilidade Real (com dividendos)
-            hist_adjusted = stock.history(period="1y", auto_adjust=True)
-
-            # Preço Atual (Nominal)
-            price = stock.fast_info.last_price
-            if not price and not hist_nominal.empty:
-                price = hist_nominal["Close"].iloc[-1]
-
-            # Cálculos Estatísticos
-            if not hist_nominal.empty:
-                # MÍNIMA/MÁXIMA (Usa Nominal - Preço de Tela)
-                clean_hist = hist_nominal[hist_nominal["Low"] > 0.01]
-                if clean_hist.empty:
-                    clean_hist = hist_nominal
-
-                low52 = clean_hist["Low"].min()
-                high52 = clean_hist["High"].max()
-
-                # VARIAÇÃO 12M (Usa Ajustado - Retorno Total)
-                if not hist_adjusted.empty:
-                    start_adj = hist_adjusted["Close"].iloc[0]
-                    end_adj = hist_adjusted["Close"].iloc[-1]
-                    chg52 = (end_adj - start_adj) / start_adj if start_adj else 0
-                else:
-                    chg52 = 0
-
-                # Dividend Yield (Prioridade: Info da API > Cálculo Manual)
-                div_yield = 0
-
-                # 1. Tenta pegar do .info
-                try:
-                    info_dy = stock.info.get("dividendYield")
-                    if info_dy is not None:
-                        div_yield = info_dy
-                except:
-                    pass
-
-                # 2. Se falhou ou veio zerado/estranho, calcula na mão (Soma 12m)
-                if not div_yield:
-                    try:
-                        dividends = stock.dividends
-                        if not dividends.empty:
-                            # Remove timezone para evitar erros de compatibilidade
-                            dividends.index = dividends.index.tz_localize(None)
-                            cutoff = datetime.datetime.now() - datetime.timedelta(
-                                days=365
-                            )
-                            last_year_divs = dividends[dividends.index >= cutoff]
-                            div_yield = last_year_divs.sum() / price if price else 0
-                    except:
-                        pass
-            else:
-                # Fallback se não tiver histórico
-                info = stock.info
-                price = info.get("currentPrice") or info.get("regularMarketPrice")
-                low52 = info.get("fiftyTwoWeekLow")
-                high52 = info.get("fiftyTwoWeekHigh")
-                div_yield = info.get("dividendYield")
-                chg52 = info.get("52WeekChange")
-
-            # Filtros de sanidade
-            if div_yield and div_yield < 0:
-                div_yield = None
-            if low52 and low52 <= 0.01:
-                low52 = None
-
-            def fmt(val, prefix="", suffix="", mult=1):
-                if (
-                    val is None
-                    or val == "-"
-                    or (isinstance(val, float) and math.isnan(val))
-                ):
-                    return "N/A"
-                return f"{prefix}{val * mult:.2f}{suffix}"
-
-            current = fmt(price, prefix="R$ ")
-            min_52 = fmt(low52, prefix="R$ ")
-            max_52 = fmt(high52, prefix="R$ ")
-            # Ajuste de escala: Se > 0.6, assumimos que já é porcentagem (ex: 11.45)
-            dy_mult = 100
-            if div_yield and div_yield > 0.6:
-                dy_mult = 1
-            dy = fmt(div_yield, suffix="%", mult=dy_mult)
-            var_12m = fmt(chg52, suffix="%", mult=100)
-
-            # Dashboard Alinhado (ASCII Art Clean)
-            stock_data_str = (
-                f"┌{'─' * 14}┬{'─' * 14}┬{'─' * 14}┬{'─' * 14}┬{'─' * 14}┐\n"
-                f"│ {'PREÇO ATUAL':^12} │ {'MIN 52 SEM':^12} │ {'MAX 52 SEM':^12} │ {'DIV. YIELD':^12} │ {'VAR. 12M':^12} │\n"
-                f"├{'─' * 14}┼{'─' * 14}┼{'─' * 14}┼{'─' * 14}┼{'─' * 14}┤\n"
-                f"│ {current:^12} │ {min_52:^12} │ {max_52:^12} │ {dy:^12} │ {var_12m:^12} │\n"
-                f"└{'─' * 14}┴{'─' * 14}┴{'─' * 14}┴{'─' * 14}┴{'─' * 14}┘"
-            )
-
-        except Exception:
-            pass
 
+def _finish(stock_data_str, peer_data=""):
     if "PREÇO" in stock_data_str:
-        print(
+        log.info(
             f"   ↳ {Colors.GREEN}Métricas financeiras coletadas (Dashboard).{Colors.ENDC}"
         )
     else:
-        print(f"   ↳ {Colors.WARNING}Aviso: Cotação indisponível.{Colors.ENDC}")
-    return {"stock_data": stock_data_str}
+        log.warning(f"   ↳ {Colors.WARNING}Aviso: Cotação indisponível.{Colors.ENDC}")
+    return {"stock_data": stock_data_str, "peer_data": peer_data}
+
+
+def _analyse(ticker, peer_mode):
+    """Dashboard do ativo e, no modo setorial, a tabela de comparação."""
+    stock_data_str, peer_data = "Dados Indisponíveis", ""
+    metrics = None
+    try:
+        metrics = _load(ticker)
+        stock_data_str = _dashboard(metrics)
+    except Exception as e:
+        record_error("dashboard", e)
+    if peer_mode and metrics is not None:
+        try:
+            peer_data = _peers(ticker, metrics)
+        except Exception as e:
+            record_error("comparação setorial", e)
+    return _finish(stock_data_str, peer_data)
+
+
+def node_market_analyst(state: ResearchState):
+    ticker = _start(state)
+    return _analyse(ticker, state.get("peer_mode", False))
+
+
+async def anode_market_analyst(state: ResearchState):
+    """Versão assíncrona: o yfinance (bloqueante) roda em uma thread do executor."""
+    ticker = _start(state)
+    return await asyncio.to_thread(_analyse, ticker, state.get("peer_mode", False))
@@ -1,286 +1,364 @@
 import os
-import time
-
-import requests
-from langchain_community.utilities import GoogleSearchAPIWrapper
-from langchain_core.messages import HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-# Importação atualizada do DuckDuckGo
-try:
-    from ddgs import DDGS  # Novo pacote
-except ImportError:
-    from duckduckgo_search import DDGS  # Fallback para versão antiga
 
+from ..background import sync_node
 from ..config import Colors
+from ..dedup import NearDuplicates, dedupe
+from ..links import avalidate_links
+from ..log import log
+from ..llm import get_llm_pool
+from ..metrics import record_error
+from ..prompts import PromptBuilder, attach_summaries, fit_news, news_item, render_news
+from ..ranking import rank as rank_news
+from ..search import addg_text, asearch_outcome, asearch_parallel, ddg_text, google_results
 from ..state import ResearchState
-from ..utils import suppress_stdout_stderr
+
+# FILTROS CRÍTICOS - Bloqueia páginas de cotação
+BLOCKLIST = [
+    "/cotacoes/", "/cotacao/", "/acoes/", "/indicadores/",
+    "statusinvest.com", "investidor10.com", "fundamentus.com",
+    "/tag/", "reclameaqui.com"
+]
+EMERGENCY_BLOCKLIST = ["/cotacoes/", "/cotacao/", "/acoes/", "statusinvest", "investidor10"]
+NEWS_KEYWORDS = ["lucro", "resultado", "trimestre", "banco central", "dividendo", "reporta", "anuncia", "balanço"]
+
+# Sites de NOTÍCIAS financeiras (não cotação)
+NEWS_SITES = "site:infomoney.com.br/onde-investir OR site:valor.globo.com/financas OR site:braziljournal.com OR site:moneytimes.com.br/mercados OR site:einvestidor.estadao.com.br"
 
 
-def node_researcher(state: ResearchState):
+def _start(state):
     company = state["company_name"]
     ticker_obj = state["ticker"]
     ticker_clean = ticker_obj.replace(".SA", "") if ticker_obj and ticker_obj != "N/A" else company
 
-    print(
+    log.info(
         f"{Colors.BLUE}🕵️  [Researcher]{Colors.ENDC} Buscando inteligência para: {Colors.BOLD}{ticker_clean}{Colors.ENDC}... (Ticker: {ticker_obj if ticker_obj else 'N/A'})"
     )
+    return company, ticker_obj, ticker_clean
+
+
+def _use_google():
+    return "GOOGLE_CSE_ID" in os.environ and "GOOGLE_API_KEY" in os.environ
+
+
+def _search_plan(company, ticker_obj, ticker_clean, google):
+    """Busca do resumo e camadas de notícias, na ordem que define o ranking.
+
+    Retorna (kwargs da busca do resumo, [(rótulo, kwargs de cada camada)]).
+    """
+    # Filtros de exclusão AMPLIADOS (bloqueia páginas de cotação)
+    company_slug = "".join(e for e in company if e.isalnum()).lower()
+    exclusions = f"-site:{company_slug}.com.br -site:reclameaqui.com.br -site:consumidor.gov.br -site:statusinvest.com.br -site:investidor10.com.br -cotacao -indicadores"
+
+    # Ajusta query base para buscar NOTÍCIAS
+    if ticker_obj and ticker_obj != "N/A":
+        search_base = f"{company} {ticker_clean}"
+    else:
+        search_base = f"{company}"
+
+    if google:
+        keywords = "lucro OR resultado OR balanço OR dividendo OR anuncia"
+        q1 = f'{NEWS_SITES} {search_base} {keywords}'
+        q2 = f'"{search_base}" notícia mercado financeiro {exclusions}'
+        summary = {"query": f"{company} {ticker_clean} ri institucional", "num_results": 2, "kind": "summary"}
+        layers = [
+            ("Query 1", {"query": q1, "num_results": 8}),
+            ("Query 2", {"query": q2, "num_results": 8}),
+        ]
+    else:
+        # Camada 1: Notícias específicas de mercado
+        keywords = "lucro OR resultado OR balanço OR dividendo"
+        q1 = f'{search_base} {keywords} notícia {exclusions}'
+        # Camada 2: Busca com foco em portais financeiros
+        q2 = f'{NEWS_SITES} {search_base}'
+        # Camada 3: Busca aberta sem restrição de tempo
+        q3 = f'{search_base} notícias mercado financeiro {exclusions}'
+        summary = {"query": f"{company} sobre empresa", "max_results": 2, "kind": "summary"}
+        layers = [
+            ("Query 1", {"query": q1, "max_results": 8, "timelimit": "m"}),
+            ("Query 2", {"query": q2, "max_results": 8, "timelimit": "m"}),
+            ("Query 3", {"query": q3, "max_results": 10}),
+        ]
+    return summary, layers
+
+
+def _summary_text(results, field):
+    return "\n".join([f"- {r[field]}" for r in results]) if results else "Sem dados."
+
+
+class _Candidates(list):
+    """Candidatos a notícia na ordem das camadas, um por matéria.
+
+    URLs repetidas (inclusive com parâmetros de rastreamento ou em versão
+    AMP/mobile) e a mesma notícia republicada em outro portal entram uma vez.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.duplicates = NearDuplicates()
+
+    def add(self, results):
+        """Filtra apenas URLs de NOTÍCIAS (não cotação); devolve quantas eram repetidas."""
+        repeated = 0
+        for r in results:
+            url = r.get("href") or r.get("link")
+            body = r.get("body") or r.get("snippet", "")
+            title = r.get("title", "")
+
+            if not url:
+                continue
+            if any(block in url.lower() for block in BLOCKLIST):
+                continue
+
+            # Só adiciona se parecer notícia (tem palavras-chave)
+            text_content = f"{title} {body}".lower()
+            if not any(kw in text_content for kw in NEWS_KEYWORDS):
+                continue
+
+            if self.duplicates.seen(url, title, body):
+                repeated += 1
+                continue
+            self.append({"title": title, "href": url, "body": body})
+        return repeated
+
+    def wants(self, label, query):
+        """Se a próxima camada ainda precisa ser aguardada (mescla até ter 3)."""
+        if len(self) >= 3:
+            # Não espera as camadas seguintes
+            log.info(f"   ↳ {label} descartada (candidatos suficientes)")
+            return False
+        log.info(f"   🔍 {label}: {query[:80]}...")
+        return True
+
+    def merge(self, results):
+        repeated = self.add(results)
+        extra = f" ({repeated} repetidos descartados)" if repeated else ""
+        log.info(f"   ↳ {len(results)} resultados brutos{extra}")
+
+
+def _print_validation(to_check, valid_candidates, statuses):
+    for idx, r in enumerate(to_check):
+        status = statuses.get(idx)
+        if status is not None and status < 400:
+            log.info(f"   [{idx + 1}] ✓ {r['title'][:60]}...")
+        elif status is not None:
+            log.warning(f"   [{idx + 1}] ✗ Status {status}")
+    log.info(f"   ↳ {Colors.GREEN}{len(valid_candidates)} notícias válidas{Colors.ENDC}")
+
+
+def _emergency_filter(results):
+    # Aplica os mesmos filtros (e uma notícia por matéria)
+    return dedupe([
+        r for r in results
+        if r.get("href") and not any(b in r["href"].lower() for b in EMERGENCY_BLOCKLIST)
+    ])
+
+
+def _fast_mode():
+    """Modo rápido: só o ranking local, sem a chamada ao Gemini."""
+    return os.getenv("OLIMPIA_NEWS_FAST", "0").lower() in ("1", "true", "yes")
+
+
+def _rank(company, ticker_clean, valid_candidates):
+    """Ordena os candidatos válidos pelo ranking local (BM25 + recência + portal)."""
+    ranked = rank_news(valid_candidates, company, ticker_clean)
+    scores = ", ".join(f"{c['score']:.1f}" for c in ranked[:3])
+    log.info(f"   ↳ {Colors.CYAN}📊 Ranking local:{Colors.ENDC} top 3 ({scores})")
+    return ranked
+
+
+def _summary_prompt(company, items):
+    builder = PromptBuilder("news")
+    builder.section(
+        "LISTA (já selecionada e ordenada por relevância)",
+        render_news(items),
+        fit=lambda max_tokens: fit_news(items, max_tokens),
+    )
+    return builder.build(f"""Você é Editor de Investment Banking. Resuma as {len(items)} notícias sobre: {company}.
 
-    summary = ""
-    news = ""
-    
-    try:
-        # Filtros de exclusão AMPLIADOS (bloqueia páginas de cotação)
-        company_slug = "".join(e for e in company if e.isalnum()).lower()
-        exclusions = f"-site:{company_slug}.com.br -site:reclameaqui.com.br -site:consumidor.gov.br -site:statusinvest.com.br -site:investidor10.com.br -cotacao -indicadores"
-        
-        # Sites de NOTÍCIAS financeiras (não cotação)
-        news_sites = "site:infomoney.com.br/onde-investir OR site:valor.globo.com/financas OR site:braziljournal.com OR site:moneytimes.com.br/mercados OR site:einvestidor.estadao.com.br"
-
-        candidates = []
-        seen_urls = set()
-
-        def add_candidates(results):
-            """Filtra apenas URLs de NOTÍCIAS (não cotação)"""
-            for r in results:
-                url = r.get("href") or r.get("link")
-                body = r.get("body") or r.get("snippet", "")
-                title = r.get("title", "")
-
-                if not url or url in seen_urls:
-                    continue
-                
-                # FILTROS CRÍTICOS - Bloqueia páginas de cotação
-                blocklist = [
-                    "/cotacoes/", "/cotacao/", "/acoes/", "/indicadores/",
-                    "statusinvest.com", "investidor10.com", "fundamentus.com",
-                    "/tag/", "reclameaqui.com"
-                ]
-                
-                if any(block in url.lower() for block in blocklist):
-                    continue
-                
-                # Só adiciona se parecer notícia (tem palavras-chave)
-                text_content = f"{title} {body}".lower()
-                news_keywords = ["lucro", "resultado", "trimestre", "banco central", "dividendo", "reporta", "anuncia", "balanço"]
-                
-                if not any(kw in text_content for kw in news_keywords):
-                    continue
-
-                seen_urls.add(url)
-                candidates.append({"title": title, "href": url, "body": body})
-
-        # Estratégia híbrida
-        USE_GOOGLE = "GOOGLE_CSE_ID" in os.environ and "GOOGLE_API_KEY" in os.environ
-
-        # Ajusta query base para buscar NOTÍCIAS
-        if ticker_obj and ticker_obj != "N/A":
-            search_base = f"{company} {ticker_clean}"
-        else:
-            search_base = f"{company}"
+{{sections}}
 
-        if USE_GOOGLE:
-            print(f"   {Colors.BLUE}📡 Usando Google Search API...{Colors.ENDC}")
-            try:
-                search = GoogleSearchAPIWrapper()
-
-                # Busca resumo
-                res_sum = search.results(f"{company} {ticker_clean} ri institucional", num_results=2)
-                summary = "\n".join([f"- {r['snippet']}" for r in res_sum]) if res_sum else "Sem dados."
-
-                # Query para NOTÍCIAS
-                keywords = "lucro OR resultado OR balanço OR dividendo OR anuncia"
-                q1 = f'{news_sites} {search_base} {keywords}'
-                print(f"   🔍 Query 1: {q1[:80]}...")
-                res1 = search.results(q1, num_results=8)
-                print(f"   ↳ {len(res1)} resultados brutos")
-                add_candidates(res1)
-
-                if len(candidates) < 3:
-                    q2 = f'"{search_base}" notícia mercado financeiro {exclusions}'
-                    print(f"   🔍 Query 2: {q2[:80]}...")
-                    res2 = search.results(q2, num_results=8)
-                    print(f"   ↳ {len(res2)} resultados brutos")
-                    add_candidates(res2)
-                    
-            except Exception as e:
-                print(f"   {Colors.FAIL}❌ Erro Google: {e}{Colors.ENDC}")
-                USE_GOOGLE = False
+CRITÉRIOS:
+- Um item para CADA notícia, na mesma ordem
+- Foque no impacto para o investidor (resultados, dividendos, M&A)
+
+FORMATO OBRIGATÓRIO (Markdown):
+* **[Título da Notícia](URL completa)**
+  > Resumo executivo em 1-2 linhas sobre o impacto.
+
+REGRA: Mantenha os links COMPLETOS sem alteração.""")
+
+
+def _all_items(answers, items, prompt):
+    """Validação do resumo: um item por notícia do prompt, com os links intactos."""
+    expected = [n for n in items if n["href"] in prompt]
+
+    def has_all_items(text):
+        answers.append(text)
+        if text.count("**[") >= len(expected) and all(n["href"] in text for n in expected):
+            return True
+        log.warning(f"   ⚠️ IA retornou {text.count('**[')} itens, tentando novamente...")
+        return False
+
+    return has_all_items
+
+
+def _top3(valid_candidates):
+    """Top 3 automático (sem IA ou quando a curadoria falha)."""
+    news_list = []
+    for r in valid_candidates[:3]:
+        title = r["title"].split(" - ")[0].split(" | ")[0][:80]
+        snippet = r.get("body", "Sem descrição")[:120]
+        news_list.append(f"* **[{title}]({r['href']})**\n  > {snippet}...")
+    return "\n\n".join(news_list)
+
+
+def _without_llm(ranked):
+    if _fast_mode():
+        log.info("   ⚡ Modo rápido: Top 3 do ranking local")
+    else:
+        log.warning(f"   {Colors.WARNING}⚠️ Sem IA: Top 3 do ranking local{Colors.ENDC}")
+    return _top3(ranked)
+
+
+def _curated_or_top3(curated_news, valid_candidates):
+    if curated_news and "**[" in curated_news:
+        return curated_news
+    # Fallback mecânico (mesma ordem do ranking)
+    log.warning(f"   {Colors.WARNING}⚠️ Fallback: Top 3 do ranking local{Colors.ENDC}")
+    return _top3(valid_candidates)
 
-        if not USE_GOOGLE:
-            print(f"   {Colors.BLUE}📡 Usando DuckDuckGo...{Colors.ENDC}")
-            try:
-                with DDGS() as ddgs:
-                    # Busca resumo
-                    print(f"   🔍 Buscando resumo corporativo...")
-                    res_sum = list(ddgs.text(f"{company} sobre empresa", region="br-pt", max_results=2))
-                    summary = "\n".join([f"- {r['body']}" for r in res_sum]) if res_sum else "Sem dados."
-
-                    # Camada 1: Notícias específicas de mercado
-                    keywords = "lucro OR resultado OR balanço OR dividendo"
-                    q1 = f'{search_base} {keywords} notícia {exclusions}'
-                    print(f"   🔍 Query 1: {q1[:80]}...")
-                    res1 = list(ddgs.text(q1, region="br-pt", max_results=8, timelimit="m"))
-                    print(f"   ↳ {len(res1)} resultados brutos")
-                    add_candidates(res1)
-
-                    # Camada 2: Busca com foco em portais financeiros
-                    if len(candidates) < 3:
-                        q2 = f'{news_sites} {search_base}'
-                        print(f"   🔍 Query 2: {q2[:80]}...")
-                        res2 = list(ddgs.text(q2, region="br-pt", max_results=8, timelimit="m"))
-                        print(f"   ↳ {len(res2)} resultados brutos")
-                        add_candidates(res2)
-
-                    # Camada 3: Busca aberta sem restrição de tempo
-                    if len(candidates) < 3:
-                        q3 = f'{search_base} notícias mercado financeiro {exclusions}'
-                        print(f"   🔍 Query 3: {q3[:80]}...")
-                        res3 = list(ddgs.text(q3, region="br-pt", max_results=10))
-                        print(f"   ↳ {len(res3)} resultados brutos")
-                        add_candidates(res3)
-                        
-            except Exception as e:
-                print(f"   {Colors.FAIL}❌ Erro DuckDuckGo: {e}{Colors.ENDC}")
 
-        print(f"   ↳ Total de candidatos válidos: {len(candidates)}")
+def _curation_failed(e, answers):
+    record_error("curadoria", e)
+    log.error(f"   ✗ Erro na curadoria: {str(e)[:80]}")
+    # Aproveita a última resposta parcial, se houver
+    return answers[-1] if answers else ""
+
+
+def _no_news():
+    log.error(f"   {Colors.FAIL}❌ Nenhuma notícia válida{Colors.ENDC}")
+    return "⚠️ Nenhuma notícia recente encontrada nos portais financeiros monitorados."
+
+
+def _failed(e):
+    record_error("Researcher", e)
+    log.error(f"   {Colors.FAIL}❌ Erro crítico: {str(e)}{Colors.ENDC}")
+    return {"summary_data": "Erro na coleta.", "news_data": f"⚠️ Erro: {str(e)}", "news_items": []}
+
+
+async def _collect(company, ticker_obj, ticker_clean):
+    """Resumo corporativo e candidatos a notícia (Google CSE ou DuckDuckGo)."""
+    summary = ""
+    candidates = _Candidates()
+    google = _use_google()
+
+    if google:
+        log.info(f"   {Colors.BLUE}📡 Usando Google Search API...{Colors.ENDC}")
+        try:
+            summary_kwargs, layers = _search_plan(company, ticker_obj, ticker_clean, google=True)
+            # Resumo e camadas de notícias saem juntos (uma ida à rede)
+            res_sum, *futures = asearch_parallel(
+                [(google_results, summary_kwargs)] + [(google_results, kw) for _, kw in layers]
+            )
+            res_sum, error = await asearch_outcome(res_sum)
+            if error:
+                raise error
+            summary = _summary_text(res_sum, "snippet")
+            for (label, kwargs), future in zip(layers, futures):
+                if candidates.wants(label, kwargs["query"]):
+                    results, error = await asearch_outcome(future)
+                    if error:
+                        raise error
+                    candidates.merge(results)
+        except Exception as e:
+            record_error("Google CSE", e)
+            log.error(f"   {Colors.FAIL}❌ Erro Google: {e}{Colors.ENDC}")
+            google = False
+
+    if not google:
+        log.info(f"   {Colors.BLUE}📡 Usando DuckDuckGo...{Colors.ENDC}")
+        try:
+            summary_kwargs, layers = _search_plan(company, ticker_obj, ticker_clean, google=False)
+            # Resumo e as 3 camadas saem juntos; a ordem das queries
+            # continua definindo o ranking na mesclagem
+            log.info("   🔍 Buscando resumo corporativo e notícias em paralelo...")
+            res_sum, *futures = asearch_parallel(
+                [(ddg_text, summary_kwargs)] + [(ddg_text, kw) for _, kw in layers]
+            )
+            res_sum, _ = await asearch_outcome(res_sum)
+            summary = _summary_text(res_sum, "body")
+            for (label, kwargs), future in zip(layers, futures):
+                if candidates.wants(label, kwargs["query"]):
+                    results, error = await asearch_outcome(future)
+                    if error:
+                        raise error
+                    candidates.merge(results)
+        except Exception as e:
+            record_error("DuckDuckGo", e)
+            log.error(f"   {Colors.FAIL}❌ Erro DuckDuckGo: {e}{Colors.ENDC}")
+
+    log.info(f"   ↳ Total de candidatos válidos: {len(candidates)}")
+    return summary, candidates
+
+
+async def anode_researcher(state: ResearchState):
+    """Buscas no pool de buscas, validação de links e curadoria no event loop."""
+    company, ticker_obj, ticker_clean = _start(state)
+
+    try:
+        summary, candidates = await _collect(company, ticker_obj, ticker_clean)
 
         # Validação de links
         valid_candidates = []
-        
         if candidates:
-            print(f"   ↳ Validando {len(candidates)} links...")
-            
-            for idx, r in enumerate(candidates[:15], 1):  # Aumentado para 15
-                try:
-                    headers = {
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                    }
-                    resp = requests.head(r["href"], headers=headers, timeout=5, allow_redirects=True)
-                    
-                    if resp.status_code < 400:
-                        valid_candidates.append(r)
-                        print(f"   [{idx}] ✓ {r['title'][:60]}...")
-                    else:
-                        print(f"   [{idx}] ✗ Status {resp.status_code}")
-                except Exception as e:
-                    continue
-
-            print(f"   ↳ {Colors.GREEN}{len(valid_candidates)} notícias válidas{Colors.ENDC}")
+            to_check = candidates[:15]
+            log.info(f"   ↳ Validando {len(to_check)} links em paralelo...")
+            valid_candidates, statuses = await avalidate_links(to_check, timeout=5)
+            _print_validation(to_check, valid_candidates, statuses)
 
         # Se não encontrou nada, busca genérica
         if not valid_candidates:
-            print(f"   {Colors.WARNING}⚠️ Buscando de forma mais ampla...{Colors.ENDC}")
+            log.warning(f"   {Colors.WARNING}⚠️ Buscando de forma mais ampla...{Colors.ENDC}")
             try:
-                with DDGS() as ddgs:
-                    emergency = list(ddgs.text(f"{company} notícia mercado", region="br-pt", max_results=10))
-                    
-                    for r in emergency:
-                        url = r.get("href", "")
-                        # Aplica os mesmos filtros
-                        blocklist = ["/cotacoes/", "/cotacao/", "/acoes/", "statusinvest", "investidor10"]
-                        if any(b in url.lower() for b in blocklist):
-                            continue
-                        
-                        try:
-                            headers = {"User-Agent": "Mozilla/5.0"}
-                            resp = requests.head(url, headers=headers, timeout=3, allow_redirects=True)
-                            if resp.status_code < 400:
-                                valid_candidates.append(r)
-                                if len(valid_candidates) >= 5:
-                                    break
-                        except:
-                            continue
-                    
-                    print(f"   ↳ Busca ampla: {len(valid_candidates)} válidos")
-            except:
-                pass
-
-        if valid_candidates:
-            # Curadoria com IA
-            if "GEMINI_API_KEY" in os.environ:
-                print(f"   ↳ {Colors.CYAN}🧠 IA selecionando as 3 melhores...{Colors.ENDC}")
-                
-                keys = os.environ["GEMINI_API_KEY"].split(",")
-                curated_news = ""
-                
-                for k_idx, key in enumerate(keys):
-                    key = key.strip()
-                    if not key:
-                        continue
-
-                    try:
-                        llm = ChatGoogleGenerativeAI(
-                            model="gemini-2.5-flash",
-                            temperature=0.1,
-                            google_api_key=key,
-                        )
-
-                        news_feed = "\n\n".join([
-                            f"ID {i + 1}:\nTítulo: {n['title']}\nLink: {n['href']}\nResumo: {n['body'][:200]}"
-                            for i, n in enumerate(valid_candidates)
-                        ])
-
-                        prompt = f"""Você é Editor de Investment Banking. Selecione as 3 MELHORES notícias sobre: {company}.
-
-LISTA:
-{news_feed}
-
-CRITÉRIOS:
-- Priorize: Resultados financeiros, dividendos, análises, M&A
-- IGNORE: Páginas de cotação, tutoriais, cursos
-- Retorne EXATAMENTE 3 itens
-
-FORMATO OBRIGATÓRIO (Markdown):
-* **[Título da Notícia](URL completa)**
-  > Resumo executivo em 1-2 linhas sobre o impacto.
+                results = await addg_text(f"{company} notícia mercado", max_results=10)
+                valid_candidates, _ = await avalidate_links(
+                    _emergency_filter(results), target=5, timeout=3
+                )
+                log.info(f"   ↳ Busca ampla: {len(valid_candidates)} válidos")
+            except Exception as e:
+                record_error("busca ampla", e)
 
-REGRA: Mantenha os links COMPLETOS sem alteração."""
-
-                        res = llm.invoke([HumanMessage(content=prompt)])
-                        curated_news = res.content.strip()
-                        
-                        # Valida que tem 3 itens
-                        if curated_news.count("**[") >= 3:
-                            print(f"   {Colors.GREEN}✓ IA selecionou 3 notícias{Colors.ENDC}")
-                            break
-                        else:
-                            print(f"   ⚠️ IA retornou {curated_news.count('**[')} itens, tentando novamente...")
-                            continue
-                            
-                    except Exception as e:
-                        print(f"   ✗ Erro chave #{k_idx + 1}")
-                        continue
-
-                if curated_news and "**[" in curated_news:
-                    news = curated_news
-                else:
-                    # Fallback mecânico
-                    print(f"   {Colors.WARNING}⚠️ Fallback: Top 3 automático{Colors.ENDC}")
-                    news_list = []
-                    for r in valid_candidates[:3]:
-                        title = r["title"].split(" - ")[0].split(" | ")[0][:80]
-                        snippet = r.get("body", "Sem descrição")[:120]
-                        news_list.append(f"* **[{title}]({r['href']})**\n  > {snippet}...")
-                    news = "\n\n".join(news_list)
-            else:
-                # Sem IA
-                print(f"   {Colors.WARNING}⚠️ Sem IA: Top 3 automático{Colors.ENDC}")
-                news_list = []
-                for r in valid_candidates[:3]:
-                    title = r["title"].split(" - ")[0][:80]
-                    snippet = r.get("body", "")[:120]
-                    news_list.append(f"* **[{title}]({r['href']})**\n  > {snippet}...")
-                news = "\n\n".join(news_list)
+        items = []
+        if not valid_candidates:
+            news = _no_news()
         else:
-            news = "⚠️ Nenhuma notícia recente encontrada nos portais financeiros monitorados."
-            print(f"   {Colors.FAIL}❌ Nenhuma notícia válida{Colors.ENDC}")
+            # Ranking local; a IA só resume as 3 primeiras
+            ranked = _rank(company, ticker_clean, valid_candidates)
+            items = [news_item(c) for c in ranked[:3]]
+            if "GEMINI_API_KEY" in os.environ and not _fast_mode():
+                log.info(f"   ↳ {Colors.CYAN}🧠 IA resumindo as {len(items)} melhores...{Colors.ENDC}")
+                answers = []
+                prompt = _summary_prompt(company, items)
+                try:
+                    curated_news = await get_llm_pool().ainvoke(
+                        prompt,
+                        temperature=0.1,
+                        validate=_all_items(answers, items, prompt),
+                    )
+                    log.info(f"   {Colors.GREEN}✓ IA resumiu {len(items)} notícias{Colors.ENDC}")
+                except Exception as e:
+                    curated_news = _curation_failed(e, answers)
+                news = _curated_or_top3(curated_news, ranked)
+                items = attach_summaries(items, news)
+            else:
+                news = _without_llm(ranked)
 
-        print(f"   ↳ {Colors.GREEN}Pesquisa concluída{Colors.ENDC}")
-        
+        log.info(f"   ↳ {Colors.GREEN}Pesquisa concluída{Colors.ENDC}")
     except Exception as e:
-        summary = "Erro na coleta."
-        news = f"⚠️ Erro: {str(e)}"
-        print(f"   {Colors.FAIL}❌ Erro crítico: {str(e)}{Colors.ENDC}")
-    
-    return {"summary_data": summary, "news_data": news}
\ No newline at end of file
+        return _failed(e)
+
+    return {"summary_data": summary, "news_data": news, "news_items": items}
+
+
+# Caminho síncrono (CLI): a mesma corrotina, no loop de fundo do processo
+node_researcher = sync_node(anode_researcher)
@@ -0,0 +1,142 @@
+"""Montagem dos prompts do Gemini com orçamento de tokens.
+
+Os prompts são montados a partir de dados estruturados (itens de notícia,
+métricas do dashboard) e não do Markdown exibido ao usuário: seções repetidas
+saem, textos longos são cortados em fim de palavra e, se ainda passar do
+orçamento, os resumos das notícias encolhem antes de qualquer item sair.
+"""
+
+import re
+
+from .config import PROMPT_BUDGET_TOKENS
+from .log import log
+
+# Estimativa sem tokenizer local: ~4 caracteres por token em português
+CHARS_PER_TOKEN = 4
+
+# Tamanhos tentados para o resumo de cada notícia até caber no orçamento
+NEWS_BODY_CHARS = (200, 140, 80, 0)
+
+_ITEM_RE = re.compile(r"\*\*\[(?P<title>.+?)\]\((?P<href>[^)\s]+)\)\*\*\s*\n\s*>\s*(?P<summary>.+)")
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate(text, max_tokens):
+    """Corta o texto em fim de palavra para caber em `max_tokens`."""
+    limit = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[: max(0, limit - 1)].rsplit(" ", 1)[0].rstrip(" ,;:-")
+    return f"{cut}…" if cut else ""
+
+
+def unique_lines(text, seen):
+    """Linhas de `text` que ainda não apareceram (ignora caixa e espaços)."""
+    kept = []
+    for line in text.splitlines():
+        key = " ".join(line.lower().split()).lstrip("-*> ")
+        if key and key in seen:
+            continue
+        seen.add(key)
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def news_item(candidate, summary=None):
+    """Item estruturado de notícia (guardado no estado como `news_items`)."""
+    return {
+        "title": candidate["title"].split(" - ")[0].split(" | ")[0].strip(),
+        "href": candidate["href"],
+        "body": candidate.get("body", ""),
+        "score": candidate.get("score"),
+        "summary": summary,
+    }
+
+
+def attach_summaries(items, markdown):
+    """Copia para os itens os resumos escritos pela IA (casados pelo link)."""
+    summaries = {m["href"]: m["summary"].strip() for m in _ITEM_RE.finditer(markdown or "")}
+    return [{**item, "summary": summaries.get(item["href"], item["summary"])} for item in items]
+
+
+def render_news(items, body_chars=200):
+    return "\n\n".join(
+        f"ID {i + 1}:\nTítulo: {item['title']}\nLink: {item['href']}"
+        + (f"\nResumo: {(item.get('summary') or item['body'])[:body_chars]}" if body_chars else "")
+        for i, item in enumerate(items)
+    )
+
+
+def fit_news(items, max_tokens):
+    """Lista de notícias dentro de `max_tokens`: encolhe os resumos e, por fim, corta itens."""
+    items = list(items)
+    while items:
+        for body_chars in NEWS_BODY_CHARS:
+            block = render_news(items, body_chars)
+            if estimate_tokens(block) <= max_tokens:
+                return block
+        items.pop()
+    return ""
+
+
+def compact_dashboard(stock_data):
+    """Dashboard ASCII em uma linha "ROTULO: valor | ..." (a moldura custa tokens)."""
+    rows = [
+        [cell.strip() for cell in line.strip().strip("│").split("│")]
+        for line in stock_data.splitlines()
+        if line.count("│") > 1
+    ]
+    if len(rows) != 2 or len(rows[0]) != len(rows[1]):
+        return stock_data.strip()
+    return " | ".join(f"{label}: {value}" for label, value in zip(*rows))
+
+
+class PromptBuilder:
+    """Instruções fixas + seções opcionais em ordem de prioridade, dentro de um orçamento.
+
+    `section(nome, texto)` cria a seção já sem as linhas repetidas de seções
+    anteriores; `build()` corta as seções de menor prioridade (as últimas
+    adicionadas) até o prompt caber em `budget` tokens.
+    """
+
+    def __init__(self, name, budget=None):
+        self.name = name
+        self.budget = budget or PROMPT_BUDGET_TOKENS[name]
+        self._sections = []
+        self._seen = set()
+
+    def section(self, label, text, fit=None):
+        """Adiciona uma seção; `fit(max_tokens)` a remonta menor quando precisar."""
+        text = unique_lines(text or "", self._seen)
+        if text:
+            self._sections.append((label, text, fit))
+        return self
+
+    def _render(self, template, sections):
+        body = "\n\n".join(f"[{label}]:\n{text}" for label, text, _ in sections)
+        return template.replace("{sections}", body)
+
+    def build(self, template):
+        """Preenche `{sections}` do template, respeitando o orçamento."""
+        sections = list(self._sections)
+        prompt = self._render(template, sections)
+        tokens = estimate_tokens(prompt)
+        # Da menor para a maior prioridade
+        for i in reversed(range(len(sections))):
+            if tokens <= self.budget:
+                break
+            label, text, fit = sections[i]
+            available = estimate_tokens(text) - (tokens - self.budget)
+            text = (fit(available) if fit else truncate(text, available)) if available > 0 else ""
+            if text:
+                sections[i] = (label, text, fit)
+            else:
+                del sections[i]
+            prompt = self._render(template, sections)
+            tokens = estimate_tokens(prompt)
+
+        log.debug(f"prompt {self.name}: ~{tokens} tokens (orçamento {self.budget})")
+        return prompt
@@ -0,0 +1,177 @@
+"""Ranking local dos candidatos a notícia (sem rede, em milissegundos).
+
+BM25 sobre título e resumo, com o nome/ticker da empresa e um léxico
+financeiro em português como consulta ponderada, multiplicado por pesos de
+recência (data na URL ou no resumo) e do portal de origem.
+"""
+
+import datetime
+import math
+import re
+import unicodedata
+from collections import Counter
+from urllib.parse import urlparse
+
+# Léxico financeiro (radicais, ver `_stem`) e o peso de cada termo na consulta.
+# Inclui as NEWS_KEYWORDS do Researcher e termos de eventos relevantes.
+LEXICON = {
+    "lucro": 2.0,
+    "prejui": 1.8,
+    "result": 2.0,
+    "balanc": 1.6,
+    "trimes": 1.4,
+    "divide": 2.0,
+    "jcp": 1.8,
+    "proven": 1.6,
+    "receit": 1.2,
+    "ebitda": 1.4,
+    "margem": 1.0,
+    "guidan": 1.2,
+    "recomp": 1.4,
+    "aquisi": 1.6,
+    "fusao": 1.6,
+    "incorp": 1.2,
+    "divida": 1.0,
+    "endivi": 1.0,
+    "rating": 1.0,
+    "report": 1.0,
+    "anunci": 1.0,
+    "banco": 0.6,
+    "centra": 0.6,
+}
+
+# Portais de notícias financeiras (demais domínios valem 1.0)
+DOMAIN_WEIGHTS = {
+    "valor.globo.com": 1.3,
+    "reuters.com": 1.3,
+    "braziljournal.com": 1.2,
+    "infomoney.com.br": 1.2,
+    "bloomberglinea.com.br": 1.2,
+    "einvestidor.estadao.com.br": 1.1,
+    "moneytimes.com.br": 1.1,
+    "exame.com": 1.1,
+    "seudinheiro.com": 1.0,
+}
+
+# Parâmetros do BM25 e peso extra dos termos do título
+K1 = 1.2
+B = 0.75
+TITLE_BOOST = 2
+
+# Recência: notícias de hoje valem até (1 + RECENCY_BOOST); metade a cada meia-vida
+RECENCY_BOOST = 0.5
+RECENCY_HALF_LIFE_DAYS = 30
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_URL_DATE_RE = re.compile(r"/(20\d{2})/(\d{1,2})(?:/(\d{1,2}))?/")
+_AGO_RE = re.compile(r"\b(?:ha\s+)?(\d+)\s+(hora|horas|dia|dias|hour|hours|day|days)\b")
+_MONTHS = {
+    "jan": 1, "fev": 2, "mar": 3, "abr": 4, "mai": 5, "jun": 6,
+    "jul": 7, "ago": 8, "set": 9, "out": 10, "nov": 11, "dez": 12,
+}
+_PT_DATE_RE = re.compile(r"\b(\d{1,2}) de (" + "|".join(_MONTHS) + r")\w*\.? de (20\d{2})\b")
+
+
+def _fold(text):
+    """Minúsculas e sem acentos."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _stem(token):
+    """Radical leve: sem o plural em "s" e cortado em 6 letras."""
+    if len(token) > 4 and token.endswith("s"):
+        token = token[:-1]
+    return token[:6]
+
+
+def tokenize(text):
+    return [_stem(t) for t in _TOKEN_RE.findall(_fold(text))]
+
+
+def _document(candidate):
+    """Termos do candidato, com o título contado TITLE_BOOST vezes."""
+    return tokenize(candidate.get("title", "")) * TITLE_BOOST + tokenize(candidate.get("body", ""))
+
+
+def query_terms(company, ticker=None):
+    """Consulta ponderada: léxico + nome da empresa e raiz do ticker."""
+    terms = dict(LEXICON)
+    for token in tokenize(company) + tokenize(ticker or ""):
+        if len(token) > 2:
+            terms[token] = max(terms.get(token, 0.0), 1.5)
+    return terms
+
+
+def published_at(candidate, now=None):
+    """Data da notícia (URL /AAAA/MM/DD/, "há N dias" ou "12 de set. de 2025")."""
+    now = now or datetime.datetime.now()
+    match = _URL_DATE_RE.search(candidate.get("href", ""))
+    if match:
+        year, month, day = (int(g) if g else 1 for g in match.groups())
+        try:
+            return datetime.datetime(year, month, day)
+        except ValueError:
+            pass
+    text = _fold(f"{candidate.get('title', '')} {candidate.get('body', '')}")
+    match = _AGO_RE.search(text)
+    if match:
+        n, unit = int(match.group(1)), match.group(2)
+        hours = n if unit.startswith("hora") or unit.startswith("hour") else n * 24
+        return now - datetime.timedelta(hours=hours)
+    match = _PT_DATE_RE.search(text)
+    if match:
+        try:
+            return datetime.datetime(int(match.group(3)), _MONTHS[match.group(2)], int(match.group(1)))
+        except ValueError:
+            pass
+    return None
+
+
+def recency_weight(candidate, now=None):
+    now = now or datetime.datetime.now()
+    date = published_at(candidate, now)
+    if date is None:
+        return 1.0
+    age_days = max(0.0, (now - date).total_seconds() / 86400)
+    return 1.0 + RECENCY_BOOST * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+
+def domain_weight(url):
+    host = urlparse(url).netloc.lower()
+    for domain, weight in DOMAIN_WEIGHTS.items():
+        if host == domain or host.endswith("." + domain):
+            return weight
+    return 1.0
+
+
+def rank(candidates, company, ticker=None, now=None):
+    """Candidatos ordenados do mais ao menos relevante, com o campo `score`.
+
+    O IDF é calculado sobre os próprios candidatos; empates mantêm a ordem
+    das camadas de busca.
+    """
+    if not candidates:
+        return []
+    docs = [Counter(_document(c)) for c in candidates]
+    lengths = [sum(d.values()) for d in docs]
+    avg_length = sum(lengths) / len(lengths) or 1.0
+    terms = query_terms(company, ticker)
+    n = len(docs)
+    idf = {}
+    for term in terms:
+        df = sum(1 for d in docs if term in d)
+        idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    ranked = []
+    for position, (candidate, doc, length) in enumerate(zip(candidates, docs, lengths)):
+        bm25 = 0.0
+        for term, weight in terms.items():
+            tf = doc.get(term)
+            if tf:
+                norm = K1 * (1 - B + B * length / avg_length)
+                bm25 += weight * idf[term] * tf * (K1 + 1) / (tf + norm)
+        score = bm25 * domain_weight(candidate.get("href", "")) * recency_weight(candidate, now)
+        ranked.append((-score, position, {**candidate, "score": round(score, 3)}))
+    ranked.sort(key=lambda item: item[:2])
+    return [candidate for _, _, candidate in ranked]
@@ -0,0 +1,120 @@
+import asyncio
+import contextvars
+import functools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import get_search_cache
+from .config import SEARCH_TTL_SECONDS
+from .metrics import record_cache_hit, timed_call
+from .utils import backend_slot
+
+# O cliente do Google (httplib2) não é thread-safe: um por thread
+_google = threading.local()
+
+# Cliente do DuckDuckGo, importado só na primeira busca que passa do cache
+DDGS = None
+
+# Pool compartilhado para disparar as camadas de busca ao mesmo tempo
+_search_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
+
+
+def _google_wrapper():
+    """Reaproveita o cliente do Google CSE (a construção faz discovery HTTP)."""
+    if getattr(_google, "wrapper", None) is None:
+        from langchain_community.utilities import GoogleSearchAPIWrapper
+
+        _google.wrapper = GoogleSearchAPIWrapper()
+    return _google.wrapper
+
+
+def _ddgs():
+    """Classe DDGS (importação atualizada, com fallback para o pacote antigo)."""
+    global DDGS
+    if DDGS is None:
+        try:
+            from ddgs import DDGS as client  # Novo pacote
+        except ImportError:
+            from duckduckgo_search import DDGS as client  # Fallback para versão antiga
+        DDGS = client
+    return DDGS
+
+
+def ddg_text(query, region="br-pt", max_results=10, timelimit=None, kind="news"):
+    """Busca no DuckDuckGo passando pelo cache em disco.
+
+    `kind` escolhe a validade do cache (ver SEARCH_TTL_SECONDS em config).
+    """
+    cache = get_search_cache()
+    key = cache.make_key("ddg", query, region, timelimit, max_results)
+    results = cache.get(key, SEARCH_TTL_SECONDS[kind])
+    if results is not None:
+        record_cache_hit("ddg")
+        return results
+
+    with backend_slot("ddg"), timed_call("ddg") as call:
+        with _ddgs()() as ddgs:
+            results = list(
+                ddgs.text(query, region=region, max_results=max_results, timelimit=timelimit)
+            )
+        call.bytes = len(json.dumps(results, ensure_ascii=False).encode("utf-8"))
+
+    # Lista vazia costuma ser bloqueio temporário: não guarda
+    if results:
+        cache.store(key, "ddg", query, results)
+    return results
+
+
+def google_results(query, num_results=8, kind="news"):
+    """Busca no Google CSE (cota de 100/dia) passando pelo cache em disco."""
+    cache = get_search_cache()
+    key = cache.make_key("google", query, None, None, num_results)
+    results = cache.get(key, SEARCH_TTL_SECONDS[kind])
+    if results is not None:
+        record_cache_hit("google")
+        return results
+
+    with backend_slot("google"), timed_call("google") as call:
+        results = _google_wrapper().results(query, num_results=num_results)
+        call.bytes = len(json.dumps(results, ensure_ascii=False).encode("utf-8"))
+
+    # O wrapper devolve [{"Result": "No good Google Search Result was found"}]
+    results = [r for r in results if r.get("link")]
+    if results:
+        cache.store(key, "google", query, results)
+    return results
+
+
+def _on_search_pool(fn, **kwargs):
+    """Roda uma busca bloqueante no pool de buscas sem bloquear o event loop."""
+    call = functools.partial(contextvars.copy_context().run, fn, **kwargs)
+    return asyncio.get_running_loop().run_in_executor(_search_pool, call)
+
+
+async def addg_text(query, **kwargs):
+    """Versão assíncrona de `ddg_text` (o cliente DDGS é bloqueante)."""
+    return await _on_search_pool(ddg_text, query=query, **kwargs)
+
+
+def asearch_parallel(calls):
+    """Dispara várias buscas ao mesmo tempo e retorna os futures na mesma ordem.
+
+    `calls` é uma lista de (função, kwargs). Quem consome decide quais
+    resultados esperar (ver `asearch_outcome`); buscas descartadas continuam
+    rodando em segundo plano e alimentam o cache. Cada busca herda o contexto
+    (métricas da execução e nó atual).
+    """
+    futures = [_on_search_pool(fn, **kwargs) for fn, kwargs in calls]
+    for future in futures:
+        # Camadas descartadas não são aguardadas: evita o aviso de exceção perdida
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    return futures
+
+
+async def asearch_outcome(future):
+    """(resultados, erro) de uma busca disparada por `asearch_parallel`."""
+    try:
+        return await future, None
+    except Exception as e:
+        return [], e
@@ -0,0 +1,210 @@
+"""Serviço HTTP de relatórios com caches e clientes aquecidos.
+
+    POST /report   {"company": "Petrobras", "refresh": false, "peers": false}
+    GET  /health
+    GET  /metrics
+
+O app compilado, o índice de tickers, os caches em SQLite, os clientes do
+Gemini e o cliente HTTP da validação de links vivem enquanto o processo
+estiver de pé, e a tabela de métricas (src/analytics.py) é atualizada em
+segundo plano após o fechamento. Os relatórios rodam com os nós assíncronos
+no event loop do servidor, e pedidos simultâneos para o mesmo ativo
+compartilham uma única execução do grafo (single-flight).
+"""
+
+import asyncio
+import collections
+import time
+
+from aiohttp import web
+
+from .analytics import get_analytics_table, refresh_loop
+from .batch import arun_report
+from .cache import get_llm_cache, get_market_cache, get_search_cache, get_url_cache
+from .config import SERVER_HOST, SERVER_PORT, SERVER_WORKERS, Colors
+from .checkpoint import aclose_checkpointer
+from .links import close_shared_client, open_shared_client
+from .llm import get_llm_pool
+from .market_data import validation_stats
+from .metrics import aggregate_profiles, percentile
+from .ticker_index import get_ticker_index, normalize
+
+# Quantas execuções recentes entram nos percentis do /metrics
+RECENT_RUNS = 200
+
+
+class ReportService:
+    """Executa o grafo (async) com limite de relatórios e deduplica pedidos por ativo."""
+
+    def __init__(self, workers=SERVER_WORKERS):
+        self.app = None
+        self.started_at = time.time()
+        self._limit = asyncio.Semaphore(max(1, workers))
+        self._inflight = {}
+        self._analytics_job = None
+        self._recent = collections.deque(maxlen=RECENT_RUNS)
+        self.counters = {"requests": 0, "runs": 0, "shared": 0, "errors": 0}
+
+    def warm_up(self):
+        """Importa o grafo e abre índices, caches e clientes antes do 1º pedido."""
+        from . import workflow  # noqa: F401  (importa e compila o grafo)
+
+        get_ticker_index()
+        for open_cache in (get_market_cache, get_url_cache, get_search_cache, get_llm_cache):
+            open_cache()
+        get_llm_pool().warm()
+
+    async def start(self):
+        from .workflow import get_async_app
+
+        await asyncio.to_thread(self.warm_up)
+        open_shared_client()
+        self.app = await get_async_app()
+        # Tabela de métricas: atualiza se estiver velha e depois todo dia após o fechamento
+        self._analytics_job = asyncio.create_task(refresh_loop())
+
+    async def _run(self, company, refresh, peers):
+        async with self._limit:
+            return await arun_report(self.app, company, refresh, peers)
+
+    def flight_key(self, company, refresh=False, peers=False):
+        """Chave do single-flight: o ticker do índice local ou o nome normalizado.
+
+        A comparação setorial é outro relatório e não compartilha a execução;
+        um pedido com `refresh` também não pega carona em uma execução que
+        reaproveita checkpoints.
+        """
+        match = get_ticker_index().lookup(company)
+        key = match.ticker if match else normalize(company)
+        if peers:
+            key = f"PEERS:{key}"
+        return f"{key}:refresh" if refresh else key
+
+    async def report(self, company, refresh=False, peers=False):
+        """Resultado do relatório (compartilhado se o ativo já está em execução)."""
+        self.counters["requests"] += 1
+        key = self.flight_key(company, refresh, peers)
+        task = self._inflight.get(key)
+        if task is None:
+            self.counters["runs"] += 1
+            task = asyncio.ensure_future(self._run(company, refresh, peers))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+            shared = False
+        else:
+            self.counters["shared"] += 1
+            shared = True
+        # shield: se um cliente desconectar, a execução continua para os demais
+        result = await asyncio.shield(task)
+        return {**result, "shared": shared}
+
+    def _finish(self, key, task):
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        result = task.result()
+        if result["status"] != "ok":
+            self.counters["errors"] += 1
+        self._recent.append(result)
+
+    def metrics(self):
+        recent = list(self._recent)
+        seconds = [r["seconds"] for r in recent]
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            **self.counters,
+            "in_flight": sorted(self._inflight),
+            "latency": {
+                "count": len(seconds),
+                "p50": round(percentile(seconds, 50), 3),
+                "p95": round(percentile(seconds, 95), 3),
+            },
+            "percentiles": aggregate_profiles([r["profile"] for r in recent]),
+            "ticker_validation_cache": validation_stats(),
+            "gemini_keys": get_llm_pool().stats(),
+            "llm_cache": get_llm_cache().stats(),
+            "analytics": self._analytics_stats(),
+        }
+
+    def _analytics_stats(self):
+        table = get_analytics_table()
+        if table is None:
+            return {"tickers": 0, "age_seconds": None}
+        return {"tickers": len(table), "age_seconds": round(table.age(), 1)}
+
+    async def shutdown(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._analytics_job is not None:
+            self._analytics_job.cancel()
+        await close_shared_client()
+        await aclose_checkpointer()
+
+
+async def handle_report(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        body = {}
+    company = str(body.get("company") or "").strip()
+    if not company:
+        return web.json_response({"error": "Informe 'company' no corpo JSON."}, status=400)
+
+    service = request.app["service"]
+    result = await service.report(
+        company, refresh=bool(body.get("refresh")), peers=bool(body.get("peers"))
+    )
+
+    if request.query.get("format") == "markdown" and result["status"] == "ok":
+        return web.Response(text=result["report"], content_type="text/markdown")
+    if request.query.get("profile") != "1":
+        result = {k: v for k, v in result.items() if k != "profile"}
+    return web.json_response(result, status=200 if result["status"] == "ok" else 502)
+
+
+async def handle_health(request):
+    service = request.app["service"]
+    return web.json_response(
+        {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - service.started_at, 1),
+            "in_flight": len(service._inflight),
+        }
+    )
+
+
+async def handle_metrics(request):
+    return web.json_response(request.app["service"].metrics())
+
+
+def create_app(workers=SERVER_WORKERS):
+    service = ReportService(workers)
+    application = web.Application()
+    application["service"] = service
+    application.add_routes(
+        [
+            web.post("/report", handle_report),
+            web.get("/health", handle_health),
+            web.get("/metrics", handle_metrics),
+        ]
+    )
+
+    async def on_startup(app):
+        await service.start()
+
+    async def on_cleanup(app):
+        await service.shutdown()
+
+    application.on_startup.append(on_startup)
+    application.on_cleanup.append(on_cleanup)
+    return application
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT, workers=SERVER_WORKERS):
+    print(
+        f"{Colors.HEADER}🌐 [Servidor]{Colors.ENDC} http://{host}:{port} "
+        f"({workers} relatórios simultâneos) — POST /report, GET /health, GET /metrics"
+    )
+    web.run_app(create_app(workers), host=host, port=port, print=None)
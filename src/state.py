@@ -1,10 +1,25 @@
-from typing import TypedDict
+from typing import Annotated, TypedDict
+
+
+def merge_dict(left, right):
+    """Reducer que mescla os dicionários escritos por nós paralelos."""
+    return {**(left or {}), **(right or {})}
 
 
 class ResearchState(TypedDict):
     company_name: str
+    # Modo comparação setorial (tabela com as empresas do mesmo setor)
+    peer_mode: bool
     ticker: str
     summary_data: str
     news_data: str
+    # Notícias escolhidas em formato estruturado (título, link, resumo, score)
+    news_items: list
     stock_data: str
+    # Tabela Markdown da comparação setorial (vazia fora do modo peers)
+    peer_data: str
     final_report: str
+    # "ai", "mock" ou "fallback"
+    report_source: str
+    # Horário (epoch) da última execução completa de cada nó
+    updated_at: Annotated[dict, merge_dict]
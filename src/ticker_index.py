@@ -0,0 +1,304 @@
+import csv
+import json
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import NamedTuple
+
+from .config import PEER_LIMIT, TICKER_INDEX_PATH
+
+TICKER_RE = re.compile(r"\b([A-Z]{4}\d{1,2})\b")
+_WORD_RE = re.compile(r"[^\W_]+")
+
+# Sufixos societários removidos do fim das razões sociais
+_CORPORATE_SUFFIXES = {"S", "A", "SA", "LTD", "INC", "HOLDING", "PARTICIPACOES"}
+
+# Similaridade mínima (Dice sobre trigramas) para aceitar um nome aproximado
+# (abaixo disso, ex: "Banco Pine" -> Banco Pan com 0.67, o TickerFinder segue
+# para validação/busca/IA)
+MIN_NAME_SCORE = 0.7
+
+# Vantagem mínima sobre a segunda empresa mais parecida (empate não decide)
+MIN_NAME_MARGIN = 0.1
+
+
+class TickerMatch(NamedTuple):
+    ticker: str  # Com sufixo .SA
+    method: str  # "exact", "symbol", "typo", "prefix" ou "fuzzy"
+    score: float
+    name: str
+    sector: str
+
+
+def normalize(text):
+    """Maiúsculas, sem acentos e só com letras/dígitos separados por espaço."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^A-Z0-9]+", " ", text.upper())
+    return " ".join(text.split())
+
+
+def _strip_suffixes(key):
+    tokens = key.split()
+    while len(tokens) > 1 and tokens[-1] in _CORPORATE_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _deletes(key):
+    """Variações com um caractere removido (índice de distância 1)."""
+    return {key[:i] + key[i + 1 :] for i in range(len(key))}
+
+
+def _edit_distance(a, b):
+    """Distância de Damerau-Levenshtein (alinhamento ótimo de strings)."""
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _load_entries(path):
+    """Lê o snapshot em JSON (lista de objetos) ou CSV (aliases separados por '|')."""
+    if path.lower().endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            return [
+                {
+                    "tickers": [t for t in row["tickers"].split("|") if t],
+                    "name": row.get("name", ""),
+                    "trade_name": row.get("trade_name", ""),
+                    "aliases": [a for a in row.get("aliases", "").split("|") if a],
+                    "sector": row.get("sector", ""),
+                }
+                for row in csv.DictReader(f)
+            ]
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class TickerIndex:
+    """Índice em memória das listagens da B3 para resolver nomes sem rede.
+
+    Resolve nomes, nomes de pregão e apelidos (sem acento, maiúsculas),
+    tickers digitados com um erro (ex: KBLN4 -> KLBN4) e nomes aproximados
+    por similaridade de trigramas.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._symbols = {}  # PETR3 -> entrada
+        self._names = {}  # PETROBRAS -> entrada
+        self._compact = {}  # PETRORIO (sem espaços) -> entrada
+        self._symbol_deletes = defaultdict(set)
+        self._trigrams = defaultdict(set)
+        self._gram_counts = {}
+        self._sectors = {}  # PETROLEO E GAS -> "Petróleo e Gás"
+        self._max_name_words = 1
+
+        for entry in entries:
+            if entry.get("sector"):
+                self._sectors.setdefault(normalize(entry["sector"]), entry["sector"])
+            for symbol in entry["tickers"]:
+                self._symbols[symbol] = entry
+                self._symbol_deletes[symbol].add(symbol)
+                for d in _deletes(symbol):
+                    self._symbol_deletes[d].add(symbol)
+
+            keys = {entry.get("trade_name", ""), entry.get("name", ""), *entry.get("aliases", [])}
+            keys = {normalize(k) for k in keys if k}
+            keys |= {_strip_suffixes(k) for k in keys}
+            # Raiz do ticker (ex: MGLU) também resolve para o papel principal
+            keys |= {s[:4] for s in entry["tickers"]}
+            for key in keys:
+                if not key:
+                    continue
+                # O primeiro registro vence em caso de colisão
+                self._names.setdefault(key, entry)
+                self._compact.setdefault(key.replace(" ", ""), entry)
+                self._max_name_words = max(self._max_name_words, len(key.split()))
+                grams = _trigrams(key)
+                self._gram_counts[key] = len(grams)
+                for gram in grams:
+                    self._trigrams[gram].add(key)
+
+    def __len__(self):
+        return len(self._symbols)
+
+    @classmethod
+    def from_file(cls, path=TICKER_INDEX_PATH):
+        return cls(_load_entries(path))
+
+    def _match(self, entry, method, score, symbol=None):
+        symbol = symbol or entry["tickers"][0]
+        return TickerMatch(
+            f"{symbol}.SA", method, score, entry.get("trade_name", ""), entry.get("sector", "")
+        )
+
+    def entry_for(self, ticker):
+        """Entrada do snapshot para um ticker (com ou sem .SA)."""
+        return self._symbols.get(ticker.replace(".SA", "").upper())
+
+    def find_sector(self, query):
+        """Nome do setor digitado (sem acento/caixa) ou None."""
+        return self._sectors.get(normalize(query))
+
+    def sector_members(self, sector):
+        """Papel principal de cada empresa do setor, na ordem do snapshot."""
+        return [f"{e['tickers'][0]}.SA" for e in self.entries if e.get("sector") == sector]
+
+    def peers(self, ticker, limit=PEER_LIMIT):
+        """O ticker seguido das demais empresas do mesmo setor (até `limit` no total)."""
+        entry = self.entry_for(ticker)
+        if not entry or not entry.get("sector"):
+            return [ticker]
+        others = [
+            f"{e['tickers'][0]}.SA"
+            for e in self.entries
+            if e.get("sector") == entry["sector"] and e is not entry
+        ]
+        return [ticker] + others[: max(0, limit - 1)]
+
+    def mentions(self, text):
+        """Empresas citadas no texto (papel principal de cada uma).
+
+        Conta o ticker (PETR4) ou um nome/apelido do índice que comece com
+        maiúscula ("Vale anuncia", mas não "vale a pena"); o nome mais longo
+        vence ("Banco do Brasil", não só "Banco").
+        """
+        words = _WORD_RE.findall(text)
+        keys = [normalize(w) for w in words]
+        found = set()
+        i = 0
+        while i < len(words):
+            if TICKER_RE.fullmatch(keys[i]):
+                entry = self._symbols.get(keys[i])
+                found.add(entry["tickers"][0] if entry else keys[i])
+                i += 1
+                continue
+            size = 0
+            if words[i][0].isupper():
+                for n in range(min(self._max_name_words, len(words) - i), 0, -1):
+                    key = " ".join(keys[i : i + n])
+                    if len(key) > 1 and key in self._names:
+                        found.add(self._names[key]["tickers"][0])
+                        size = n
+                        break
+            i += size or 1
+        return found
+
+    def lookup(self, query):
+        """Resolve um nome ou ticker para um TickerMatch (ou None)."""
+        key = normalize(query)
+        if not key:
+            return None
+
+        # 1. Nome, apelido ou raiz exatos (também sem os espaços: "Petro Rio")
+        entry = (
+            self._names.get(key)
+            or self._names.get(_strip_suffixes(key))
+            or self._compact.get(key.replace(" ", ""))
+        )
+        if entry:
+            return self._match(entry, "exact", 1.0)
+
+        # 2. Ticker digitado (exato ou com um erro de digitação)
+        ticker_match = TICKER_RE.search(key)
+        if ticker_match:
+            match = self._lookup_symbol(ticker_match.group(1))
+            if match:
+                return match
+
+        # 3. Primeira palavra (ex: "Vale do Rio Doce"), só se nenhum nome de
+        # outra empresa começar por ela (PETRO é Petrobras, mas PETRORIO não)
+        first = key.split()[0]
+        if first != key and first in self._names:
+            starts = {id(e) for k, e in self._compact.items() if k.startswith(first)}
+            if len(starts) == 1:
+                return self._match(self._names[first], "prefix", 0.8)
+
+        # 4. Nome aproximado por trigramas
+        return self._lookup_fuzzy(key)
+
+    def _lookup_symbol(self, symbol):
+        entry = self._symbols.get(symbol)
+        if entry:
+            return self._match(entry, "symbol", 1.0, symbol)
+
+        candidates = set(self._symbol_deletes.get(symbol, ()))
+        for d in _deletes(symbol):
+            candidates |= self._symbol_deletes.get(d, set())
+        candidates = [c for c in candidates if _edit_distance(symbol, c) == 1]
+        if not candidates:
+            return None
+
+        # Mesma raiz (só a classe errada, ex: RAIZ3 -> RAIZ4): mesma empresa,
+        # resolve para o papel principal
+        same_root = [c for c in candidates if c[:4] == symbol[:4]]
+        if same_root:
+            return self._match(self._symbols[same_root[0]], "typo", 0.9)
+
+        # Raiz diferente (ex: KBLN4 -> KLBN4): só aceita se uma única empresa
+        # estiver a um erro de distância; se houver mais de uma (ex: BBSA3 ->
+        # BBAS3 ou BBSE3?), o TickerFinder segue para validação/busca/IA
+        entries = {id(self._symbols[c]): self._symbols[c] for c in candidates}
+        if len(entries) > 1:
+            return None
+        # Prefere a mesma classe (dígitos finais) e depois o papel principal
+        digits = symbol[4:]
+        candidates.sort(
+            key=lambda c: (c[4:] != digits, self._symbols[c]["tickers"].index(c), c)
+        )
+        best = candidates[0]
+        return self._match(self._symbols[best], "typo", 0.9, best)
+
+    def _lookup_fuzzy(self, key):
+        grams = _trigrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for name in self._trigrams.get(gram, ()):
+                shared[name] += 1
+        if not shared:
+            return None
+
+        # Melhor nota de cada empresa (uma empresa tem vários nomes/apelidos)
+        best = {}
+        for name, count in shared.items():
+            score = 2 * count / (len(grams) + self._gram_counts[name])
+            entry = self._names[name]
+            if score > best.get(id(entry), (0.0, None))[0]:
+                best[id(entry)] = (score, entry)
+
+        ranked = sorted(best.values(), key=lambda item: item[0], reverse=True)
+        best_score, entry = ranked[0]
+        if best_score < MIN_NAME_SCORE:
+            return None
+        if len(ranked) > 1 and best_score - ranked[1][0] < MIN_NAME_MARGIN:
+            return None
+        return self._match(entry, "fuzzy", round(best_score, 3))
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_ticker_index():
+    """Carrega (uma vez) o índice a partir do snapshot configurado."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            try:
+                _index = TickerIndex.from_file()
+            except (OSError, ValueError):
+                _index = TickerIndex([])
+        return _index
@@ -1,23 +1,88 @@
+import asyncio
 import contextlib
-import os
 import sys
+import threading
+import weakref
 
-from .config import Colors
+from .config import MAX_CONCURRENCY, Colors
+
+# Um semáforo por backend externo (DDG, Google, yfinance, Gemini)
+_backend_semaphores = {
+    name: threading.BoundedSemaphore(max(1, limit))
+    for name, limit in MAX_CONCURRENCY.items()
+}
 
 
 @contextlib.contextmanager
-def suppress_stdout_stderr():
-    """Silencia o erro de biblioteca."""
-    with open(os.devnull, "w") as devnull:
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        try:
-            sys.stdout = devnull
-            sys.stderr = devnull
-            yield
-        finally:
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
+def backend_slot(backend):
+    """Limita o número de chamadas simultâneas a um backend externo."""
+    semaphore = _backend_semaphores[backend]
+    with semaphore:
+        yield
+
+
+# Versão asyncio dos limites: um conjunto de semáforos por event loop
+_async_semaphores = weakref.WeakKeyDictionary()
+
+
+@contextlib.asynccontextmanager
+async def abackend_slot(backend):
+    """Como `backend_slot`, para corrotinas (não bloqueia o event loop)."""
+    loop = asyncio.get_running_loop()
+    semaphores = _async_semaphores.setdefault(loop, {})
+    if backend not in semaphores:
+        semaphores[backend] = asyncio.Semaphore(max(1, MAX_CONCURRENCY[backend]))
+    async with semaphores[backend]:
+        yield
+
+
+def _style_line(line):
+    """Aplica as cores de Markdown (títulos e negrito) a uma linha."""
+    if line.strip().startswith("# "):
+        return f"{Colors.HEADER}{Colors.BOLD}{line}{Colors.ENDC}"
+    if line.strip().startswith("## "):
+        return f"\n{Colors.CYAN}{Colors.BOLD}{line}{Colors.ENDC}"
+    if line.strip().startswith("### "):
+        return f"{Colors.BLUE}{Colors.BOLD}{line}{Colors.ENDC}"
+    if "**" in line:
+        # Destaca negritos simples
+        parts = line.split("**")
+        new_line = ""
+        for i, part in enumerate(parts):
+            if i % 2 == 1:
+                new_line += f"{Colors.BOLD}{part}{Colors.ENDC}"
+            else:
+                new_line += part
+        return new_line
+    return line
+
+
+class MarkdownStreamPrinter:
+    """Imprime Markdown colorido à medida que os pedaços de texto chegam.
+
+    Cada linha é estilizada e impressa assim que termina; o resto fica no
+    buffer até o próximo pedaço (ou até `close`).
+    """
+
+    def __init__(self):
+        self.started = False
+        self._buffer = ""
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        self.started = True
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            print(_style_line(line))
+        sys.stdout.flush()
+
+    def close(self):
+        if self._buffer:
+            print(_style_line(self._buffer))
+            self._buffer = ""
+        sys.stdout.flush()
 
 
 def print_styled(text):
@@ -25,22 +90,6 @@ def print_styled(text):
     if not text:
         return
 
-    for line in text.split("\n"):
-        if line.strip().startswith("# "):
-            print(f"{Colors.HEADER}{Colors.BOLD}{line}{Colors.ENDC}")
-        elif line.strip().startswith("## "):
-            print(f"\n{Colors.CYAN}{Colors.BOLD}{line}{Colors.ENDC}")
-        elif line.strip().startswith("### "):
-            print(f"{Colors.BLUE}{Colors.BOLD}{line}{Colors.ENDC}")
-        elif "**" in line:
-            # Destaca negritos simples
-            parts = line.split("**")
-            new_line = ""
-            for i, part in enumerate(parts):
-                if i % 2 == 1:
-                    new_line += f"{Colors.BOLD}{part}{Colors.ENDC}"
-                else:
-                    new_line += part
-            print(new_line)
-        else:
-            print(line)
+    printer = MarkdownStreamPrinter()
+    printer.feed(text)
+    printer.close()
@@ -1,26 +1,81 @@
+import asyncio
+import weakref
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
 
-from .nodes.editor import node_editor
-from .nodes.market import node_market_analyst
-from .nodes.researcher import node_researcher
-from .nodes.ticker import node_ticker_finder
+from .checkpoint import acheckpointed, aget_checkpointer, checkpointed, get_checkpointer
+from .metrics import atimed_node, timed_node
+from .nodes.editor import anode_editor, node_editor
+from .nodes.market import anode_market_analyst, node_market_analyst
+from .nodes.researcher import anode_researcher, node_researcher
+from .nodes.ticker import anode_ticker_finder, node_ticker_finder
 from .state import ResearchState
 
 # --- DEFINIÇÃO DO GRAFO ---
 workflow = StateGraph(ResearchState)
 
-# Adiciona os nós (Agentes)
-workflow.add_node("TickerFinder", node_ticker_finder)
-workflow.add_node("Researcher", node_researcher)
-workflow.add_node("MarketAnalyst", node_market_analyst)
-workflow.add_node("Editor", node_editor)
+# Adiciona os nós (Agentes). Cada nó é pulado quando o resultado salvo no
+# checkpoint da thread (empresa + pregão) ainda está dentro do TTL do nó, e
+# todos são cronometrados para o perfil da execução (src/metrics.py).
+# Cada nó tem as versões síncrona (`invoke`/`stream`) e assíncrona
+# (`ainvoke`/`astream`), escolhidas pelo LangGraph conforme a chamada.
+def add_node(name, func, afunc, is_complete=lambda update: True):
+    workflow.add_node(
+        name,
+        RunnableLambda(
+            timed_node(name, checkpointed(name, func, is_complete)),
+            atimed_node(name, acheckpointed(name, afunc, is_complete)),
+            name=name,
+        ),
+    )
+
 
-# Define o fluxo de execução (Pipeline Linear)
+add_node(
+    "TickerFinder",
+    node_ticker_finder,
+    anode_ticker_finder,
+    lambda update: update["ticker"] != "N/A",
+)
+add_node(
+    "Researcher",
+    node_researcher,
+    anode_researcher,
+    # Erro de busca (nenhuma notícia e nenhum resumo) não fica salvo por 1h
+    lambda update: bool(update["news_items"])
+    or update["summary_data"] not in ("", "Sem dados.", "Erro na coleta."),
+)
+add_node(
+    "MarketAnalyst",
+    node_market_analyst,
+    anode_market_analyst,
+    lambda update: "PREÇO" in update["stock_data"],
+)
+add_node("Editor", node_editor, anode_editor, lambda update: update["report_source"] == "ai")
+
+# Define o fluxo de execução (Fan-out / Fan-in)
+# Researcher e MarketAnalyst só dependem do ticker e escrevem chaves
+# distintas do estado, então rodam em paralelo no mesmo superstep.
 workflow.set_entry_point("TickerFinder")
 workflow.add_edge("TickerFinder", "Researcher")
-workflow.add_edge("Researcher", "MarketAnalyst")
-workflow.add_edge("MarketAnalyst", "Editor")
+workflow.add_edge("TickerFinder", "MarketAnalyst")
+# O Editor só roda quando os dois ramos terminam (join)
+workflow.add_edge(["Researcher", "MarketAnalyst"], "Editor")
 workflow.add_edge("Editor", END)
 
-# Compila a aplicação pronta para execução
-app = workflow.compile()
+# Compila a aplicação com checkpoints em SQLite (ver src/checkpoint.py)
+app = workflow.compile(checkpointer=get_checkpointer())
+
+
+_async_apps = weakref.WeakKeyDictionary()
+
+
+async def get_async_app():
+    """Grafo compilado com o checkpointer assíncrono do event loop atual.
+
+    Mesmo grafo e mesmo checkpoints.db de `app`, para `ainvoke`/`astream`.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _async_apps:
+        _async_apps[loop] = workflow.compile(checkpointer=await aget_checkpointer())
+    return _async_apps[loop]